@@ -1,547 +1,682 @@
 # app/automation.py
 """
 Playwright automation for Outlook signup (desktop).
-- Always launches Edge visibly with persistent profile (maximized window).
+- Runs each job in its own context/tab of a warm, pooled Edge browser (maximized window).
+- Async: jobs share one event loop so their page round-trips overlap.
 - Falls back to Playwright bundled Chromium if Edge fails.
 - Detects CAPTCHA / anti-bot pages and saves screenshots for human-in-loop.
 - IMPROVED: Detailed logging, updated selectors, slow visible interactions
 """
 
-import time, traceback
-from pathlib import Path
-from playwright.sync_api import sync_playwright, Browser, BrowserContext, Page
+import asyncio, json, os, re, threading
+from urllib.parse import urlsplit
 from .logger import JobLogger
+from .browser_pool import get_pool, edge_available, PoolBusyError
+
+SIGNUP_URL = "https://signup.live.com"
 
 # Hosts & keywords to detect Microsoft bot protection
-PROTECTION_HOSTS = ["hsprotect", "perimeterx", "arkoselabs", "crcldu", "fpt.live.com"]
-CAPTCHA_KEYWORDS = ["help us", "captcha", "prove you're not", "press and hold", "verify", "puzzle", "challenge", "security check"]
+PROTECTION_HOSTS = ("hsprotect", "perimeterx", "arkoselabs", "crcldu", "fpt.live.com")
+CAPTCHA_KEYWORDS = ("help us", "captcha", "prove you're not", "not a robot", "press and hold", "verify", "puzzle", "challenge", "security check")
+
+# Compiled once so each check is a single C-level scan instead of one pass per keyword/host
+_CAPTCHA_RE = re.compile("|".join(map(re.escape, CAPTCHA_KEYWORDS)), re.IGNORECASE)
+_PROTECTION_RE = re.compile("|".join(map(re.escape, PROTECTION_HOSTS)), re.IGNORECASE)
+
+# Elements that signal each signup step is ready (or has errored) - used instead of networkidle,
+# which rarely fires on signup.live.com because of telemetry and long polls
+EMAIL_STEP_READY = 'input[name="loginfmt"], input[name="MemberName"], input[type="email"], #i0116'
+PASSWORD_STEP_READY = 'input[type="password"], input[name="passwd"], input[name="Password"], [role="alert"], [data-testid*="error"]'
+AFTER_PASSWORD_READY = ('input[name="FirstName"], input[name="BirthYear"], select[name="BirthMonth"], '
+                        'iframe[src*="hsprotect"], iframe[src*="arkoselabs"], [role="alert"], [data-testid*="error"]')
+
+# UPDATED SELECTORS FOR CURRENT MICROSOFT SIGNUP PAGE - fallbacks in priority order,
+# built once and probed together in the page (see _wait_for_any_selector)
+EMAIL_SELECTORS = [
+    'input[name="loginfmt"]',          # Most common
+    'input[type="email"]',             # Generic email input
+    'input[placeholder*="email" i]',   # Placeholder contains "email" (any case)
+    'input[aria-label*="email" i]',    # ARIA label contains "email" (any case)
+    '#i0116',                          # Microsoft's common email input ID
+    'input[name="Email"]',             # Alternative name
+    'input[id*="Email"]',              # ID contains "Email"
+]
+NEXT_SELECTORS = [
+    'input[type="submit"]',
+    'button[type="submit"]', 
+    'input[value="Next"]',
+    'button:has-text("Next")',
+    '#idSIButton9',              # Microsoft's common Next button ID
+    'input[id="idSIButton9"]',
+    '.btn-primary',
+    '[data-report-event="Signin_Submit"]'
+]
+PASSWORD_SELECTORS = [
+    'input[name="passwd"]',            # Microsoft's common password field
+    'input[name="Password"]',          # Alternative
+    'input[type="password"]',          # Generic password input
+    '#i0118',                          # Microsoft's common password input ID  
+    'input[placeholder*="password" i]', # Placeholder contains "password" (any case)
+    'input[aria-label*="password" i]', # ARIA label contains "password" (any case)
+]
+SUBMIT_SELECTORS = [
+    'input[type="submit"]',
+    'button[type="submit"]',
+    'input[value="Next"]',
+    'input[value="Create account"]',
+    'button:has-text("Create account")',
+    'button:has-text("Next")',
+    '#idSIButton9',
+    'input[id="idSIButton9"]',
+]
+
+# Resources the form never needs; challenge hosts are exempt so a human can still solve the puzzle.
+# Set BLOCK_RESOURCES=0 to load everything.
+BLOCK_RESOURCES = os.getenv("BLOCK_RESOURCES", "1") == "1"
+_BLOCKED_RESOURCE_TYPES = {"image", "font", "media", "ping"}
+_TELEMETRY_RE = re.compile(r"browser\.events\.data\.microsoft\.com|\.bing\.com/rms/", re.IGNORECASE)
+
+# Where a finished signup lands; waited on briefly after the password step.
+# Matched on the host, not the whole URL - return URLs in the query string name these hosts too.
+_SUCCESS_HOSTS = {"account.microsoft.com", "outlook.live.com"}
+SUCCESS_URL_TIMEOUT = 5000
+
+# Success indicators in page text, matched case-insensitively without lowercasing copies
+SUCCESS_INDICATORS = ("welcome", "congratulations", "account created", "success", "inbox", "outlook")
+_SUCCESS_TEXT_RE = re.compile("|".join(map(re.escape, SUCCESS_INDICATORS)), re.IGNORECASE)
 
-# Global browser context for keeping browser alive
+# Cap on the visible text read back for page classification
+PAGE_TEXT_LIMIT = 16384
+
+# Screenshots are for human triage: lossy JPEG is far cheaper to encode and transfer than PNG
+SCREENSHOT_OPTIONS = {"type": "jpeg", "quality": 70, "full_page": False, "animations": "disabled", "caret": "hide"}
+# Set DEBUG_SCREENSHOTS=1 to also capture the (usually uninteresting) unknown-state page
+DEBUG_SCREENSHOTS = os.getenv("DEBUG_SCREENSHOTS") == "1"
+# Set FAST_MODE=1 to cut the human-visible pauses (highlights, post-input waits) to a blink
+FAST_MODE = os.getenv("FAST_MODE") == "1"
+FAST_PAUSE = 0.05
+# Set DEBUG_TRACEBACKS=1 to log full stack traces for browser failures (costly under failure storms)
+DEBUG_TRACEBACKS = os.getenv("DEBUG_TRACEBACKS") == "1"
+
+# Job pages kept alive between run and resume: job_id -> (pool, context, page).
+# Jobs may run on more than one event loop/thread (the API, scripts using asyncio.run),
+# so every access goes through the lock (never held across an await).
 _active_contexts = {}
+_active_lock = threading.Lock()
+
+def active_job_ids() -> list:
+    """Job ids whose browser page is still open."""
+    with _active_lock:
+        return list(_active_contexts)
 
 def _contains_captcha_text(text: str) -> bool:
-    """Check if HTML/text contains common captcha phrases."""
+    """Check if page text contains common captcha phrases."""
     if not text:
         return False
-    t = text.lower()
-    return any(k in t for k in CAPTCHA_KEYWORDS)
+    return _CAPTCHA_RE.search(text) is not None
 
-def _is_protection_page(page) -> bool:
-    """Check if current page/frame URLs belong to known bot-protection hosts."""
-    try:
-        urls = [page.url.lower()] + [fr.url.lower() for fr in page.frames if fr.url]
-        return any(any(host in u for host in PROTECTION_HOSTS) for u in urls)
-    except Exception:
+def _is_success_url(url: str) -> bool:
+    """Check whether the browser itself is on a post-signup page (account or mailbox)."""
+    parts = urlsplit(url)
+    host = parts.hostname or ""
+    if parts.scheme != "https":
         return False
+    if host in _SUCCESS_HOSTS:
+        return True
+    return (host == "live.com" or host.endswith(".live.com")) and parts.path.startswith("/mail")
+
+def _is_success_page(text: str, url: str) -> bool:
+    """Check the page text and URL for signs the account was created."""
+    return bool((text and _SUCCESS_TEXT_RE.search(text)) or _is_success_url(url))
 
-def _safe_screenshot(page, logger: JobLogger, name_suffix="screenshot"):
-    """Capture screenshot bytes safely with logging."""
+async def _filter_request(route):
+    """Abort telemetry and heavy assets that don't affect the signup form."""
+    request = route.request
+    url = request.url
+    if _TELEMETRY_RE.search(url) or (
+            request.resource_type in _BLOCKED_RESOURCE_TYPES and not _PROTECTION_RE.search(url)):
+        await route.abort()
+    else:
+        await route.continue_()
+
+# URL, title and capped visible text in one round-trip. Visible text is enough to classify a page
+# (CAPTCHA/success phrases are in visible copy) and is far smaller than the HTML. A limit of 0
+# skips innerText, which forces a layout.
+_PAGE_STATE_JS = """limit => ({
+    url: location.href,
+    title: document.title,
+    text: limit && document.body ? document.body.innerText.slice(0, limit) : ''
+})"""
+
+async def _page_state(page, logger: JobLogger, text_limit=PAGE_TEXT_LIMIT) -> dict:
+    """Snapshot the page once instead of separate url/title/text calls."""
     try:
-        screenshot = page.screenshot()
-        logger.log("screenshot_taken", True, f"Screenshot captured ({len(screenshot)} bytes)")
-        return screenshot
+        state = await page.evaluate(_PAGE_STATE_JS, text_limit)
+    except Exception as e:
+        # e.g. the page navigated mid-call - fall back to what Playwright already knows
+        logger.log("page_state_failed", False, f"Failed to read page state: {e}")
+        state = {"url": page.url, "title": "", "text": ""}
+    # Frame URLs come from Playwright: it tracks nested frames and where each one navigated,
+    # while an iframe's src attribute only holds the URL it was created with
+    state["frameUrls"] = [f.url for f in page.frames if f is not page.main_frame]
+    return state
+
+def _is_protection_page(state: dict) -> bool:
+    """Check if the page or one of its iframes belongs to a known bot-protection host."""
+    search = _PROTECTION_RE.search
+    return search(state["url"]) is not None or any(search(u) for u in state["frameUrls"])
+
+async def _safe_screenshot(page, logger: JobLogger, name_suffix="screenshot"):
+    """Write a screenshot straight to the job's storage and return its path (None on failure)."""
+    try:
+        out = logger.path_for_shot(f"{name_suffix}.jpg")
+        await page.screenshot(path=str(out), **SCREENSHOT_OPTIONS)
+        logger.log("screenshot_taken", True, f"Screenshot saved to {out}")
+        return str(out)
     except Exception as e:
         logger.log("screenshot_failed", False, f"Screenshot failed: {e}")
         return None
 
-def _debug_page_elements(page, logger: JobLogger):
+# Describes every input and button in one round-trip instead of several evaluate() calls per element
+_DESCRIBE_ELEMENTS_JS = """() => {
+    const toDesc = el => ({
+        tag: el.tagName, type: el.type, name: el.name, id: el.id,
+        placeholder: el.placeholder, value: el.value, text: el.textContent,
+        visible: !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length)
+    });
+    return {
+        inputs: [...document.querySelectorAll('input')].map(toDesc),
+        buttons: [...document.querySelectorAll("button, input[type='submit'], input[type='button']")].map(toDesc)
+    };
+}"""
+
+async def _debug_page_elements(page, logger: JobLogger):
     """Log all input fields and buttons found on the page for debugging."""
     try:
-        # Find all input elements
-        inputs = page.query_selector_all("input")
-        logger.log("debug_inputs", True, f"Found {len(inputs)} input elements")
+        elements = await page.evaluate(_DESCRIBE_ELEMENTS_JS)
         
+        inputs = elements["inputs"]
+        logger.log("debug_inputs", True, f"Found {len(inputs)} input elements")
         for i, inp in enumerate(inputs):
-            try:
-                tag_name = inp.evaluate("el => el.tagName")
-                input_type = inp.evaluate("el => el.type") 
-                input_name = inp.evaluate("el => el.name")
-                input_id = inp.evaluate("el => el.id")
-                input_placeholder = inp.evaluate("el => el.placeholder")
-                is_visible = inp.is_visible()
-                
-                logger.log("debug_input_detail", True, 
-                    f"Input {i}: type={input_type}, name={input_name}, id={input_id}, "
-                    f"placeholder={input_placeholder}, visible={is_visible}")
-            except Exception as e:
-                logger.log("debug_input_error", False, f"Error analyzing input {i}: {e}")
+            logger.log("debug_input_detail", True, 
+                f"Input {i}: type={inp['type']}, name={inp['name']}, id={inp['id']}, "
+                f"placeholder={inp['placeholder']}, visible={inp['visible']}")
         
-        # Find all buttons
-        buttons = page.query_selector_all("button, input[type='submit'], input[type='button']")
+        buttons = elements["buttons"]
         logger.log("debug_buttons", True, f"Found {len(buttons)} button elements")
-        
         for i, btn in enumerate(buttons):
-            try:
-                tag_name = btn.evaluate("el => el.tagName")
-                btn_type = btn.evaluate("el => el.type")
-                btn_text = btn.evaluate("el => el.textContent")
-                btn_value = btn.evaluate("el => el.value") 
-                btn_id = btn.evaluate("el => el.id")
-                is_visible = btn.is_visible()
-                
-                logger.log("debug_button_detail", True,
-                    f"Button {i}: tag={tag_name}, type={btn_type}, text='{btn_text}', "
-                    f"value='{btn_value}', id={btn_id}, visible={is_visible}")
-            except Exception as e:
-                logger.log("debug_button_error", False, f"Error analyzing button {i}: {e}")
+            logger.log("debug_button_detail", True,
+                f"Button {i}: tag={btn['tag']}, type={btn['type']}, text='{btn['text']}', "
+                f"value='{btn['value']}', id={btn['id']}, visible={btn['visible']}")
                 
     except Exception as e:
         logger.log("debug_elements_failed", False, f"Failed to debug page elements: {e}")
 
-def _slow_type(page, selector: str, text: str, logger: JobLogger, delay_per_char=0.15):
+async def _pause(seconds: float):
+    """Sleep for a human-visible pause, or just a blink in FAST_MODE."""
+    await asyncio.sleep(min(seconds, FAST_PAUSE) if FAST_MODE else seconds)
+
+# Highlight styles (see _PAGE_INIT_SCRIPT); interactions only toggle a class
+_HL_TYPE = "__hl_type"
+_HL_CLICK = "__hl_click"
+_HIGHLIGHT_CSS = (
+    f".{_HL_TYPE}{{border:3px solid #00ff00 !important;background-color:#ffffcc !important;box-shadow:0 0 10px #00ff00 !important}}"
+    f".{_HL_CLICK}{{outline:4px solid #ff0000 !important;outline-offset:2px !important;background-color:#ffcccc !important}}"
+)
+# Installed once per document by an init script (init scripts take no arguments, so the CSS is
+# baked in here): the highlight stylesheet and a banner helper, so later calls only pass data
+_PAGE_INIT_SCRIPT = """(css => {
+    document.addEventListener('DOMContentLoaded', () => {
+        const style = document.createElement('style');
+        style.textContent = css;
+        document.head.appendChild(style);
+    });
+    const colors = {captcha: ['#ff6b6b', 'white'], success: ['#51cf66', 'white'], unknown: ['#ffd43b', '#000']};
+    window.__showBanner = (kind, text) => {
+        const [bg, fg] = colors[kind];
+        const banner = document.createElement('div');
+        banner.style.cssText = `
+            position: fixed; top: 0; left: 0; right: 0;
+            background: ${bg}; color: ${fg}; padding: 15px;
+            text-align: center; font-size: 16px; font-weight: bold;
+            z-index: 10000; box-shadow: 0 2px 10px rgba(0,0,0,0.3);
+        `;
+        banner.textContent = text;
+        document.body.prepend(banner);
+    };
+})(%s)""" % json.dumps(_HIGHLIGHT_CSS)
+_SHOW_BANNER_JS = "([kind, text]) => window.__showBanner(kind, text)"
+_BANNER_LOCATOR_CSS = '[style*="position: fixed"][style*="top: 0"]'
+_REMOVE_ALL_JS = "els => els.forEach(e => e.remove())"
+
+# Constant sources with the target passed as an argument: compiled once, no quoting/injection issues
+_TOGGLE_CLASS_JS = "(el, [cls, on]) => el.classList.toggle(cls, on)"
+
+async def _set_highlight(loc, cls: str, on: bool):
+    """Toggle a highlight class on the locator's element; a missing element is not an error."""
+    try:
+        await loc.evaluate(_TOGGLE_CLASS_JS, [cls, on], timeout=1000)
+    except Exception:
+        pass
+
+async def _slow_type(page, selector: str, text: str, logger: JobLogger, delay_per_char=0.15):
     """Type text slowly and visibly with highlighting."""
     try:
         logger.log("typing_start", True, f"Starting to type '{text}' in selector: {selector}")
         
+        # One locator for every step, instead of re-passing the selector to each page call
+        loc = page.locator(selector).first
+        
         # Wait for element to be available
-        page.wait_for_selector(selector, timeout=10000)
+        await loc.wait_for(state="visible", timeout=10000)
         logger.log("typing_selector_found", True, f"Selector {selector} found and ready")
         
         # Focus and highlight the field
-        page.focus(selector)
+        await loc.focus()
         logger.log("typing_focused", True, f"Focused field: {selector}")
         
-        # Add visual highlight using JavaScript
-        page.evaluate(f"""
-            const el = document.querySelector('{selector}');
-            if (el) {{
-                el.style.border = '3px solid #00ff00';
-                el.style.backgroundColor = '#ffffcc';
-                el.style.boxShadow = '0 0 10px #00ff00';
-            }}
-        """)
+        # Add visual highlight (styles come from the page's highlight stylesheet)
+        await _set_highlight(loc, _HL_TYPE, True)
         logger.log("typing_highlighted", True, f"Added visual highlight to {selector}")
         
-        time.sleep(1.0)  # Let user see the highlight
+        await _pause(1.0)  # Let user see the highlight
         
-        # Clear field first
-        page.fill(selector, "")
-        logger.log("typing_cleared", True, f"Cleared field {selector}")
-        time.sleep(0.5)
-        
-        # Type character by character
-        for i, char in enumerate(text):
-            page.type(selector, char, delay=delay_per_char * 1000)  # Playwright expects ms
-            if (i + 1) % 3 == 0:  # Log every 3 characters to avoid spam
-                logger.log("typing_progress", True, f"Typed {i+1}/{len(text)} characters")
+        if FAST_MODE:
+            # fill() replaces the value with a single input event
+            await loc.fill(text)
+        else:
+            # Clear field first
+            await loc.fill("")
+            logger.log("typing_cleared", True, f"Cleared field {selector}")
+            await _pause(0.5)
+            
+            # One call - Playwright spaces the keystrokes itself, no round-trip per character
+            await loc.press_sequentially(text, delay=delay_per_char * 1000)  # Playwright expects ms
         
         logger.log("typing_complete", True, f"Finished typing all {len(text)} characters")
         
         # Remove highlight after typing
-        page.evaluate(f"""
-            const el = document.querySelector('{selector}');
-            if (el) {{
-                el.style.border = '';
-                el.style.backgroundColor = '';
-                el.style.boxShadow = '';
-            }}
-        """)
+        await _set_highlight(loc, _HL_TYPE, False)
         logger.log("typing_unhighlighted", True, f"Removed highlight from {selector}")
         
-        time.sleep(1.0)  # Pause after typing
+        await _pause(1.0)  # Pause after typing
         return True
         
     except Exception as e:
         logger.log("typing_error", False, f"Failed to type in {selector}: {e}")
         return False
 
-def _slow_click(page, selector: str, logger: JobLogger, highlight_duration=2.0):
+async def _slow_click(page, selector: str, logger: JobLogger, highlight_duration=2.0):
     """Click element with visual feedback."""
     try:
         logger.log("clicking_start", True, f"Preparing to click: {selector}")
         
+        loc = page.locator(selector).first
+        
         # Wait for element to be available
-        page.wait_for_selector(selector, timeout=10000)
+        await loc.wait_for(state="visible", timeout=10000)
         logger.log("clicking_selector_found", True, f"Selector {selector} found and ready")
         
         # Highlight the button/element before clicking
-        page.evaluate(f"""
-            const el = document.querySelector('{selector}');
-            if (el) {{
-                el.style.outline = '4px solid #ff0000';
-                el.style.outlineOffset = '2px';
-                el.style.backgroundColor = '#ffcccc';
-            }}
-        """)
+        await _set_highlight(loc, _HL_CLICK, True)
         logger.log("clicking_highlighted", True, f"Added visual highlight to {selector}")
         
-        time.sleep(highlight_duration)
+        await _pause(highlight_duration)
         
-        page.click(selector)
+        await loc.click()
         logger.log("clicking_clicked", True, f"Successfully clicked: {selector}")
         
-        # Remove highlight
-        page.evaluate(f"""
-            const el = document.querySelector('{selector}');
-            if (el) {{
-                el.style.outline = '';
-                el.style.outlineOffset = '';
-                el.style.backgroundColor = '';
-            }}
-        """)
+        # Remove highlight (the button may already be gone if the click navigated)
+        await _set_highlight(loc, _HL_CLICK, False)
         logger.log("clicking_unhighlighted", True, f"Removed highlight from {selector}")
         
-        time.sleep(1.0)  # Wait after click
+        if FAST_MODE:
+            # The next step's readiness wait does the real waiting - just let navigation commit
+            try:
+                await page.wait_for_load_state("domcontentloaded", timeout=5000)
+            except Exception:
+                pass
+        else:
+            await asyncio.sleep(1.0)  # Wait after click
         return True
         
     except Exception as e:
         logger.log("clicking_error", False, f"Failed to click {selector}: {e}")
         return False
 
-def _wait_and_log(page, logger: JobLogger, seconds=3.0, reason="General wait"):
+async def _wait_and_log(page, logger: JobLogger, seconds=3.0, reason="General wait"):
     """Wait with logging."""
+    if FAST_MODE:
+        seconds = min(seconds, FAST_PAUSE)
     logger.log("waiting", True, f"Waiting {seconds}s - {reason}")
-    time.sleep(seconds)
+    await asyncio.sleep(seconds)
     logger.log("wait_complete", True, f"Wait completed - {reason}")
 
-def cleanup_context(job_id: str):
-    """Clean up browser context for a job."""
-    global _active_contexts
-    if job_id in _active_contexts:
+async def _wait_for_step(page, selector: str, logger: JobLogger, reason: str, timeout=15000, settle=False):
+    """Wait until the next step's elements are visible instead of waiting for network idle."""
+    try:
+        await page.wait_for_selector(selector, state="visible", timeout=timeout)
+        logger.log("step_ready", True, f"{reason} - ready")
+    except Exception as e:
+        logger.log("step_wait_timeout", False, f"{reason} - not ready after {timeout}ms: {e}")
+    if settle:
+        # Short, bounded idle wait for pages where late requests matter (e.g. challenge iframes)
         try:
-            ctx = _active_contexts[job_id]
-            ctx.close()
-            del _active_contexts[job_id]
+            await page.wait_for_load_state("networkidle", timeout=2000)
         except Exception:
             pass
 
-def run_signup(job_id: str, email: str, password: str, logger: JobLogger, headless: bool = False):
+# Resolves with the first candidate selector that has a visible match, polled inside the page.
+# Polls back off (50ms, 100ms, ... 1.5s) - a field that's already rendered is found on the first
+# check, and a missing one doesn't keep the page busy for the whole timeout.
+# Playwright's :has-text("...") isn't CSS, so it is matched by text content here.
+SELECTOR_POLL_BACKOFF = (50, 100, 200, 400, 800, 1500)
+_FIRST_VISIBLE_JS = r"""async ([sels, steps, timeout]) => {
+    const visible = el => !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+    const first = () => sels.find(s => {
+        const m = s.match(/^(.*):has-text\("(.*)"\)$/);
+        let els;
+        try { els = document.querySelectorAll(m ? m[1] : s); } catch (e) { return false; }
+        return [...els].some(el => (!m || el.textContent.includes(m[2])) && visible(el));
+    }) || null;
+    const deadline = Date.now() + timeout;
+    for (let i = 0; ; i++) {
+        const hit = first();
+        const left = deadline - Date.now();
+        if (hit || left <= 0) return hit;
+        await new Promise(r => setTimeout(r, Math.min(steps[Math.min(i, steps.length - 1)], left)));
+    }
+}"""
+
+# page.evaluate errors raised when the document it ran in was replaced by a navigation
+_NAVIGATION_ERROR_RE = re.compile(r"Execution context was destroyed|most likely because of a navigation")
+
+async def _wait_for_any_selector(page, selectors, logger: JobLogger, what: str, timeout=5000):
+    """
+    Return the first of `selectors` with a visible element - one in-page poll instead of a probe per selector.
+    A navigation kills the in-page poll; it is restarted in the new document for the time that is left.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout / 1000
+    remaining = timeout
+    while True:
+        try:
+            found = await page.evaluate(_FIRST_VISIBLE_JS, [selectors, SELECTOR_POLL_BACKOFF, remaining])
+            break
+        except Exception as e:
+            remaining = int((deadline - loop.time()) * 1000)
+            if _NAVIGATION_ERROR_RE.search(str(e)) and remaining > 0:
+                logger.log("selector_search_restarted", True, f"Page navigated while searching for {what}, retrying")
+                continue
+            logger.log("selector_search_failed", False, f"Searching for {what} failed: {e}")
+            return None
+    if found is None:
+        logger.log("selector_search_timeout", False, f"No visible {what} after {timeout}ms")
+    return found
+
+async def _wait_for_document(page, logger: JobLogger, reason: str, timeout=3000):
+    """Debounce on document readiness - returns as soon as the page has finished loading."""
+    try:
+        await page.wait_for_function("document.readyState === 'complete'", timeout=timeout)
+    except Exception as e:
+        logger.log("document_wait_timeout", False, f"{reason} - document not complete after {timeout}ms: {e}")
+
+async def cleanup_context(job_id: str):
+    """Close the job's page and hand its browser context back to the pool."""
+    with _active_lock:
+        entry = _active_contexts.pop(job_id, None)
+    if entry is None:
+        return
+    pool, ctx, page = entry
+    try:
+        await page.close()
+    except Exception:
+        pass
+    await pool.release(ctx)
+
+async def run_signup(job_id: str, email: str, password: str, logger: JobLogger, headless: bool = False,
+               persistent: bool = False):
     """
     Automates Outlook signup with visible interactions and detailed logging.
-    Returns dict with keys: status, screenshot, error
+    Runs in a fresh context of a pooled browser; `persistent=True` uses a pooled
+    persistent-profile context instead (slower to launch, keeps cookies/cache).
+    Returns dict with keys: status, screenshot (saved file path), error
     status ∈ { completed, waiting_for_human, failed, error }
     """
-    global _active_contexts
-    
     logger.log("automation_start", True, f"Starting Outlook signup automation for {email}")
-    user_data_dir = Path(logger.path).parent / f"{job_id}_profile"
-    user_data_dir.mkdir(parents=True, exist_ok=True)
-    logger.log("profile_dir_created", True, f"Profile directory: {user_data_dir}")
 
-    def _try_channel(channel_name=None):
-        """Try launching with specific channel (e.g., msedge) or bundled Chromium."""
+    async def _try_channel(channel_name=None):
+        """Try running the signup in a pooled context for a channel (e.g., msedge) or bundled Chromium."""
         try:
-            logger.log("browser_launch_start", True, f"Attempting to launch browser with channel: {channel_name}")
+            logger.log("browser_launch_start", True, f"Acquiring pooled browser with channel: {channel_name}")
             
-            with sync_playwright() as p:
-                ctx_kwargs = {
-                    "user_data_dir": str(user_data_dir),
-                    "headless": False,  # always show browser
-                    "args": [
-                        "--start-maximized",
-                        "--disable-blink-features=AutomationControlled",
-                        "--disable-web-security",
-                        "--disable-features=VizDisplayCompositor"
-                    ],
-                }
-                if channel_name:
-                    ctx_kwargs["channel"] = channel_name
-
-                ctx = p.chromium.launch_persistent_context(**ctx_kwargs)
-                logger.log("browser_launched", True, f"Browser launched successfully with channel: {channel_name}")
-                
-                # Store context globally so it doesn't close during CAPTCHA
-                _active_contexts[job_id] = ctx
-                logger.log("context_stored", True, f"Browser context stored for job: {job_id}")
-                
-                page = ctx.pages[0] if ctx.pages else ctx.new_page()
-                page.set_default_timeout(60000)
-                logger.log("page_ready", True, "Page created and timeout set to 60s")
-                
-                # Add user agent to look more human
-                page.set_extra_http_headers({
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36 Edg/120.0.0.0"
-                })
-                logger.log("user_agent_set", True, "User agent configured")
-
-                # Navigate to signup with visible progress
-                logger.log("navigation_start", True, "Navigating to https://signup.live.com")
-                page.goto("https://signup.live.com", wait_until="networkidle")
-                
-                # Log page info after navigation
-                current_url = page.url
-                page_title = page.title()
-                logger.log("navigation_complete", True, f"Navigation complete. URL: {current_url}, Title: {page_title}")
-                
-                _wait_and_log(page, logger, 3.0, "Let page fully load")
-                
-                # Debug: Log all elements on the page
-                _debug_page_elements(page, logger)
-
-                # Protection check
-                if _is_protection_page(page):
-                    logger.log("protection_detected", False, f"Bot protection detected on URL: {current_url}")
-                    shot = _safe_screenshot(page, logger, "protection")
-                    if shot:
-                        logger.save_screenshot(shot, name_suffix="protection.png")
-                    return {"status": "waiting_for_human", "screenshot": shot, "error": None}
-
-                # UPDATED SELECTORS FOR CURRENT MICROSOFT SIGNUP PAGE
-                # Step 1: Look for email input field (the page shows "Enter your email address")
-                email_selectors = [
-                    'input[name="loginfmt"]',          # Most common
-                    'input[type="email"]',             # Generic email input
-                    'input[placeholder*="email"]',     # Placeholder contains "email"
-                    'input[aria-label*="email"]',      # ARIA label contains "email"
-                    '#i0116',                          # Microsoft's common email input ID
-                    'input[name="Email"]',             # Alternative name
-                    'input[id*="Email"]',              # ID contains "Email"
-                ]
-                
-                email_filled = False
-                logger.log("email_search_start", True, f"Searching for email input field with {len(email_selectors)} selectors")
-                
-                for i, selector in enumerate(email_selectors):
-                    try:
-                        logger.log("email_selector_try", True, f"Trying email selector {i+1}/{len(email_selectors)}: {selector}")
-                        
-                        if page.is_visible(selector, timeout=3000):
-                            logger.log("email_field_found", True, f"✅ Email field found with selector: {selector}")
-                            
-                            # Type the full email address (not just alias)
-                            if _slow_type(page, selector, email, logger, delay_per_char=0.2):
-                                email_filled = True
-                                logger.log("email_filled_success", True, f"Successfully filled email: {email}")
-                                
-                                _wait_and_log(page, logger, 2.0, "After email input")
-                                
-                                # Look for Next/Continue button
-                                next_selectors = [
-                                    'input[type="submit"]',
-                                    'button[type="submit"]', 
-                                    'input[value="Next"]',
-                                    'button:has-text("Next")',
-                                    '#idSIButton9',              # Microsoft's common Next button ID
-                                    'input[id="idSIButton9"]',
-                                    '.btn-primary',
-                                    '[data-report-event="Signin_Submit"]'
-                                ]
-                                
-                                next_clicked = False
-                                logger.log("next_button_search", True, f"Searching for Next button with {len(next_selectors)} selectors")
-                                
-                                for j, next_sel in enumerate(next_selectors):
-                                    try:
-                                        logger.log("next_selector_try", True, f"Trying Next selector {j+1}/{len(next_selectors)}: {next_sel}")
-                                        if page.is_visible(next_sel, timeout=2000):
-                                            logger.log("next_button_found", True, f"✅ Next button found: {next_sel}")
-                                            if _slow_click(page, next_sel, logger, highlight_duration=2.0):
-                                                next_clicked = True
-                                                break
-                                    except Exception as e:
-                                        logger.log("next_selector_error", False, f"Next selector {next_sel} failed: {e}")
-                                
-                                if next_clicked:
-                                    logger.log("next_clicked_success", True, "Successfully clicked Next button")
-                                    page.wait_for_load_state("networkidle", timeout=30000)
-                                    _wait_and_log(page, logger, 3.0, "After clicking Next")
-                                else:
-                                    logger.log("next_click_failed", False, "Could not find or click Next button")
-                                
-                                break
-                    except Exception as e:
-                        logger.log("email_selector_error", False, f"Email selector {selector} failed: {e}")
-                        continue
-
-                if not email_filled:
-                    logger.log("email_fill_failed", False, "❌ Could not find or fill any email input field")
-                    # Take screenshot for debugging
-                    shot = _safe_screenshot(page, logger, "no_email_field")
-                    if shot:
-                        logger.save_screenshot(shot, name_suffix="no_email_field.png")
-
-                # Step 2: Look for password field (might be on next page)
-                _wait_and_log(page, logger, 2.0, "Before password field search")
-                
-                password_selectors = [
-                    'input[name="passwd"]',            # Microsoft's common password field
-                    'input[name="Password"]',          # Alternative
-                    'input[type="password"]',          # Generic password input
-                    '#i0118',                          # Microsoft's common password input ID  
-                    'input[placeholder*="password"]',   # Placeholder contains "password"
-                    'input[aria-label*="password"]',   # ARIA label contains "password"
-                ]
-                
-                password_filled = False
-                logger.log("password_search_start", True, f"Searching for password field with {len(password_selectors)} selectors")
+            pool = get_pool()
+            ctx = await pool.acquire(channel_name, persistent=persistent, logger=logger)
+            try:
+                page = await ctx.new_page()
+            except Exception:
+                await pool.release(ctx)
+                raise
+            logger.log("browser_launched", True, f"Pooled browser ready with channel: {channel_name}")
+            
+            # Store the job's page globally so it doesn't close during CAPTCHA
+            with _active_lock:
+                _active_contexts[job_id] = (pool, ctx, page)
+            logger.log("context_stored", True, f"Browser context stored for job: {job_id}")
+            
+            page.set_default_timeout(60000)
+            logger.log("page_ready", True, "Page created and timeout set to 60s")
+            
+            await page.add_init_script(script=_PAGE_INIT_SCRIPT)
+
+            if BLOCK_RESOURCES:
+                await page.route("**/*", _filter_request)
+                logger.log("resource_blocking", True, "Blocking images/fonts/media, beacons and telemetry requests")
+
+            # Navigate to signup with visible progress
+            logger.log("navigation_start", True, f"Navigating to {SIGNUP_URL}")
+            await page.goto(SIGNUP_URL, wait_until="domcontentloaded")
+            
+            # Log page info after navigation
+            state = await _page_state(page, logger, text_limit=0)
+            current_url = state["url"]
+            page_title = state["title"]
+            logger.log("navigation_complete", True, f"Navigation complete. URL: {current_url}, Title: {page_title}")
+            
+            # Protection check - only when we were redirected away from the signup host;
+            # challenges on the signup page itself are caught by the post-submit check
+            if not current_url.startswith(SIGNUP_URL) and _is_protection_page(state):
+                logger.log("protection_detected", False, f"Bot protection detected on URL: {current_url}")
+                shot = await _safe_screenshot(page, logger, "protection")
+                return {"status": "waiting_for_human", "screenshot": shot, "error": None}
+
+            await _wait_for_step(page, EMAIL_STEP_READY, logger, "Email step")
+            
+            # Debug: Log all elements on the page
+            await _debug_page_elements(page, logger)
+
+            # Step 1: Look for email input field (the page shows "Enter your email address")
+            email_filled = False
+            logger.log("email_search_start", True, f"Searching for email input field with {len(EMAIL_SELECTORS)} selectors")
+            
+            email_sel = await _wait_for_any_selector(page, EMAIL_SELECTORS, logger, "email")
+            if email_sel:
+                logger.log("email_field_found", True, f"✅ Email field found with selector: {email_sel}")
+                email_loc = page.locator(email_sel).first
                 
-                for i, selector in enumerate(password_selectors):
-                    try:
-                        logger.log("password_selector_try", True, f"Trying password selector {i+1}/{len(password_selectors)}: {selector}")
-                        
-                        if page.is_visible(selector, timeout=5000):
-                            logger.log("password_field_found", True, f"✅ Password field found with selector: {selector}")
-                            
-                            if _slow_type(page, selector, password, logger, delay_per_char=0.15):
-                                password_filled = True
-                                logger.log("password_filled_success", True, "Successfully filled password")
-                                
-                                _wait_and_log(page, logger, 2.0, "After password input")
-                                
-                                # Look for submit/create account button
-                                submit_selectors = [
-                                    'input[type="submit"]',
-                                    'button[type="submit"]',
-                                    'input[value="Next"]',
-                                    'input[value="Create account"]',
-                                    'button:has-text("Create account")',
-                                    'button:has-text("Next")',
-                                    '#idSIButton9',
-                                    'input[id="idSIButton9"]',
-                                ]
-                                
-                                submit_clicked = False
-                                logger.log("submit_button_search", True, f"Searching for submit button with {len(submit_selectors)} selectors")
-                                
-                                for j, submit_sel in enumerate(submit_selectors):
-                                    try:
-                                        logger.log("submit_selector_try", True, f"Trying submit selector {j+1}/{len(submit_selectors)}: {submit_sel}")
-                                        if page.is_visible(submit_sel, timeout=3000):
-                                            logger.log("submit_button_found", True, f"✅ Submit button found: {submit_sel}")
-                                            if _slow_click(page, submit_sel, logger, highlight_duration=2.5):
-                                                submit_clicked = True
-                                                break
-                                    except Exception as e:
-                                        logger.log("submit_selector_error", False, f"Submit selector {submit_sel} failed: {e}")
-                                
-                                if submit_clicked:
-                                    logger.log("submit_clicked_success", True, "Successfully clicked Submit button")
-                                    page.wait_for_load_state("networkidle", timeout=30000)
-                                    _wait_and_log(page, logger, 4.0, "After clicking Submit")
-                                else:
-                                    logger.log("submit_click_failed", False, "Could not find or click Submit button")
-                                
-                                break
-                    except Exception as e:
-                        logger.log("password_selector_error", False, f"Password selector {selector} failed: {e}")
-                        continue
-
-                if not password_filled:
-                    logger.log("password_fill_failed", False, "❌ Could not find or fill password field")
+                # Type the full email address (not just alias)
+                if await _slow_type(page, email_sel, email, logger, delay_per_char=0.2):
+                    email_filled = True
+                    logger.log("email_filled_success", True, f"Successfully filled email: {email}")
                     
-                # Log final URL after all interactions
-                final_url = page.url
-                final_title = page.title()
-                logger.log("final_page_info", True, f"Final URL: {final_url}, Final Title: {final_title}")
-
-                # Analyze current page state
-                page_text = ""
-                try:
-                    page_text = page.content()
-                    logger.log("page_content_retrieved", True, f"Retrieved page content ({len(page_text)} characters)")
-                except Exception as e:
-                    logger.log("page_content_failed", False, f"Failed to get page content: {e}")
-
-                # CAPTCHA / protection detection
-                if _contains_captcha_text(page_text) or _is_protection_page(page):
-                    logger.log("captcha_detected", False, "🧩 CAPTCHA/protection detected - keeping browser open")
+                    await _wait_and_log(page, logger, 2.0, "After email input")
                     
-                    # Add visual indicator for user
-                    try:
-                        page.evaluate("""
-                            const banner = document.createElement('div');
-                            banner.style.cssText = `
-                                position: fixed; top: 0; left: 0; right: 0; 
-                                background: #ff6b6b; color: white; padding: 15px; 
-                                text-align: center; font-size: 16px; font-weight: bold;
-                                z-index: 10000; box-shadow: 0 2px 10px rgba(0,0,0,0.3);
-                            `;
-                            banner.textContent = '🤖 CAPTCHA DETECTED - Please solve it manually, then click RESUME in the web interface';
-                            document.body.prepend(banner);
-                        """)
-                        logger.log("captcha_banner_added", True, "Added CAPTCHA instruction banner to page")
-                    except Exception:
-                        logger.log("captcha_banner_failed", False, "Failed to add CAPTCHA banner")
+                    # Look for Next/Continue button
+                    next_clicked = False
+                    logger.log("next_button_search", True, f"Searching for Next button with {len(NEXT_SELECTORS)} selectors")
                     
-                    shot = _safe_screenshot(page, logger, "captcha")
-                    if shot:
-                        logger.save_screenshot(shot, name_suffix="captcha.png")
+                    next_sel = await _wait_for_any_selector(page, NEXT_SELECTORS, logger, "Next button")
+                    if next_sel:
+                        logger.log("next_button_found", True, f"✅ Next button found: {next_sel}")
+                        next_clicked = await _slow_click(page, next_sel, logger, highlight_duration=2.0)
                     
-                    return {"status": "waiting_for_human", "screenshot": shot, "error": None}
+                    if next_clicked:
+                        logger.log("next_clicked_success", True, "Successfully clicked Next button")
+                        await _wait_for_step(page, PASSWORD_STEP_READY, logger, "Password step")
+                    else:
+                        logger.log("next_click_failed", False, "Could not find or click Next button - submitting with Enter")
+                        try:
+                            await email_loc.press("Enter")
+                            await _wait_for_step(page, PASSWORD_STEP_READY, logger, "Password step")
+                        except Exception as e:
+                            logger.log("enter_submit_failed", False, f"Enter submit failed: {e}")
 
-                # Success detection - look for welcome or success indicators
-                success_indicators = ["welcome", "congratulations", "account created", "success", "inbox", "outlook"]
-                page_text_lower = (page_text or "").lower()
-                final_url_lower = final_url.lower()
-                
-                is_success = any(indicator in page_text_lower for indicator in success_indicators) or \
-                           any(indicator in final_url_lower for indicator in ["outlook", "live.com/mail"])
+            if not email_filled:
+                logger.log("email_fill_failed", False, "❌ Could not find or fill any email input field")
+                # Take screenshot for debugging
+                await _safe_screenshot(page, logger, "no_email_field")
+
+            # Step 2: Look for password field (might be on next page)
+            await _wait_for_document(page, logger, "Before password field search")
+            
+            password_filled = False
+            logger.log("password_search_start", True, f"Searching for password field with {len(PASSWORD_SELECTORS)} selectors")
+            
+            password_sel = await _wait_for_any_selector(page, PASSWORD_SELECTORS, logger, "password")
+            if password_sel:
+                logger.log("password_field_found", True, f"✅ Password field found with selector: {password_sel}")
+                password_loc = page.locator(password_sel).first
                 
-                if is_success:
-                    logger.log("success_detected", True, "🎉 SUCCESS - Account creation completed!")
+                if await _slow_type(page, password_sel, password, logger, delay_per_char=0.15):
+                    password_filled = True
+                    logger.log("password_filled_success", True, "Successfully filled password")
                     
-                    # Add success banner
-                    try:
-                        page.evaluate("""
-                            const banner = document.createElement('div');
-                            banner.style.cssText = `
-                                position: fixed; top: 0; left: 0; right: 0; 
-                                background: #51cf66; color: white; padding: 15px; 
-                                text-align: center; font-size: 16px; font-weight: bold;
-                                z-index: 10000; box-shadow: 0 2px 10px rgba(0,0,0,0.3);
-                            `;
-                            banner.textContent = '✅ SUCCESS - Account created successfully!';
-                            document.body.prepend(banner);
-                        """)
-                        logger.log("success_banner_added", True, "Added success banner to page")
-                    except Exception:
-                        logger.log("success_banner_failed", False, "Failed to add success banner")
-                        
-                    shot = _safe_screenshot(page, logger, "success")
-                    _wait_and_log(page, logger, 5.0, "Let user see success message")
+                    await _wait_and_log(page, logger, 2.0, "After password input")
                     
-                    # Now we can close the browser
-                    cleanup_context(job_id)
-                    return {"status": "completed", "screenshot": shot, "error": None}
+                    # Look for submit/create account button
+                    submit_clicked = False
+                    logger.log("submit_button_search", True, f"Searching for submit button with {len(SUBMIT_SELECTORS)} selectors")
+                    
+                    submit_sel = await _wait_for_any_selector(page, SUBMIT_SELECTORS, logger, "submit button")
+                    if submit_sel:
+                        logger.log("submit_button_found", True, f"✅ Submit button found: {submit_sel}")
+                        submit_clicked = await _slow_click(page, submit_sel, logger, highlight_duration=2.5)
+                    
+                    if submit_clicked:
+                        logger.log("submit_clicked_success", True, "Successfully clicked Submit button")
+                        await _wait_for_step(page, AFTER_PASSWORD_READY, logger, "Step after password", settle=True)
+                    else:
+                        logger.log("submit_click_failed", False, "Could not find or click Submit button - submitting with Enter")
+                        try:
+                            await password_loc.press("Enter")
+                            await _wait_for_step(page, AFTER_PASSWORD_READY, logger, "Step after password", settle=True)
+                        except Exception as e:
+                            logger.log("enter_submit_failed", False, f"Enter submit failed: {e}")
 
-                # Unknown state - keep browser open for inspection
-                logger.log("unknown_state", False, f"⚠️ Unknown state - keeping browser open. URL: {final_url}")
+            if not password_filled:
+                logger.log("password_fill_failed", False, "❌ Could not find or fill password field")
                 
-                # Debug: Take screenshot and log page content snippet
-                shot = _safe_screenshot(page, logger, "unknown_state")
-                if shot:
-                    logger.save_screenshot(shot, name_suffix="unknown_state.png")
-                
-                # Log a snippet of page content for debugging
-                if page_text:
-                    snippet = page_text[:500] + "..." if len(page_text) > 500 else page_text
-                    logger.log("page_content_snippet", True, f"Page content snippet: {snippet}")
+            # Success redirects to a known URL - if it arrives, the page doesn't need to be read at all
+            reached_success_url = False
+            if password_filled:
+                try:
+                    await page.wait_for_url(_is_success_url, wait_until="commit", timeout=SUCCESS_URL_TIMEOUT)
+                    reached_success_url = True
+                    logger.log("success_url_reached", True, f"Redirected to success URL: {page.url}")
+                except Exception:
+                    pass
+
+            # Analyze current page state (text isn't needed once the success URL was reached)
+            state = await _page_state(page, logger, text_limit=0 if reached_success_url else PAGE_TEXT_LIMIT)
+            final_url = state["url"]
+            final_title = state["title"]
+            page_text = state["text"]
+            logger.log("final_page_info", True, f"Final URL: {final_url}, Final Title: {final_title}")
+            if not reached_success_url:
+                logger.log("page_content_retrieved", True, f"Retrieved visible page text ({len(page_text)} characters)")
+
+            # CAPTCHA / protection detection (a protection frame still counts on a success URL)
+            if _is_protection_page(state) or (not reached_success_url and _contains_captcha_text(page_text)):
+                logger.log("captcha_detected", False, "🧩 CAPTCHA/protection detected - keeping browser open")
                 
-                # Add inspection banner
+                # Add visual indicator for user
                 try:
-                    page.evaluate("""
-                        const banner = document.createElement('div');
-                        banner.style.cssText = `
-                            position: fixed; top: 0; left: 0; right: 0; 
-                            background: #ffd43b; color: #000; padding: 15px; 
-                            text-align: center; font-size: 16px; font-weight: bold;
-                            z-index: 10000; box-shadow: 0 2px 10px rgba(0,0,0,0.3);
-                        `;
-                        banner.textContent = '⚠️ UNKNOWN STATE - Please check manually and click RESUME if needed';
-                        document.body.prepend(banner);
-                    """)
-                    logger.log("unknown_banner_added", True, "Added unknown state banner to page")
+                    await page.evaluate(_SHOW_BANNER_JS, ["captcha", "🤖 CAPTCHA DETECTED - Please solve it manually, then click RESUME in the web interface"])
+                    logger.log("captcha_banner_added", True, "Added CAPTCHA instruction banner to page")
                 except Exception:
-                    logger.log("unknown_banner_failed", False, "Failed to add unknown state banner")
+                    logger.log("captcha_banner_failed", False, "Failed to add CAPTCHA banner")
+                
+                shot = await _safe_screenshot(page, logger, "captcha")
                 
                 return {"status": "waiting_for_human", "screenshot": shot, "error": None}
 
+            # Success detection - look for welcome or success indicators
+            is_success = reached_success_url or _is_success_page(page_text, final_url)
+            
+            if is_success:
+                logger.log("success_detected", True, "🎉 SUCCESS - Account creation completed!")
+                
+                # Add success banner
+                try:
+                    await page.evaluate(_SHOW_BANNER_JS, ["success", "✅ SUCCESS - Account created successfully!"])
+                    logger.log("success_banner_added", True, "Added success banner to page")
+                except Exception:
+                    logger.log("success_banner_failed", False, "Failed to add success banner")
+                    
+                shot = await _safe_screenshot(page, logger, "success")
+                await _wait_and_log(page, logger, 5.0, "Let user see success message")
+                
+                # Now we can close the browser
+                await cleanup_context(job_id)
+                return {"status": "completed", "screenshot": shot, "error": None}
+
+            # Unknown state - keep browser open for inspection
+            logger.log("unknown_state", False, f"⚠️ Unknown state - keeping browser open. URL: {final_url}")
+            
+            # Debug: Take screenshot (only when enabled) and log page content snippet
+            shot = None
+            if DEBUG_SCREENSHOTS:
+                shot = await _safe_screenshot(page, logger, "unknown_state")
+            
+            # Log a snippet of page content for debugging
+            if page_text:
+                snippet = page_text[:500] + "..." if len(page_text) > 500 else page_text
+                logger.log("page_content_snippet", True, f"Page content snippet: {snippet}")
+            
+            # Add inspection banner
+            try:
+                await page.evaluate(_SHOW_BANNER_JS, ["unknown", "⚠️ UNKNOWN STATE - Please check manually and click RESUME if needed"])
+                logger.log("unknown_banner_added", True, "Added unknown state banner to page")
+            except Exception:
+                logger.log("unknown_banner_failed", False, "Failed to add unknown state banner")
+            
+            return {"status": "waiting_for_human", "screenshot": shot, "error": None}
+
+        except PoolBusyError:
+            raise  # the pool is shared by every channel - fail the job rather than wait again
         except Exception as e:
-            tb = traceback.format_exc()
+            import traceback  # only needed on the failure path
+            if DEBUG_TRACEBACKS:
+                tb = traceback.format_exc()
+            else:
+                tb = "".join(traceback.format_exception_only(type(e), e)).strip()
             logger.log("channel_exception", False, f"Browser channel {channel_name} failed with exception: {e}")
-            logger.log("channel_traceback", False, f"Full traceback: {tb}")
-            cleanup_context(job_id)
+            logger.log("channel_traceback", False, f"{'Full traceback' if DEBUG_TRACEBACKS else 'Exception'}: {tb}")
+            await cleanup_context(job_id)
             return {"status": "error", "screenshot": None, "error": str(e), "traceback": tb}
 
-    # Try Edge first
-    logger.log("edge_attempt", True, "🌐 Attempting to launch Microsoft Edge...")
-    res = _try_channel("msedge")
-    if res["status"] != "error":
-        return res
+    # Try Edge first (only if installed - a doomed Edge launch just delays the fallback)
+    if edge_available():
+        logger.log("edge_attempt", True, "🌐 Attempting to launch Microsoft Edge...")
+        res = await _try_channel("msedge")
+        if res["status"] != "error":
+            return res
+        logger.log("chromium_fallback", True, "🌐 Edge failed, falling back to bundled Chromium...")
+    else:
+        logger.log("edge_missing", True, "🌐 Microsoft Edge not found, using bundled Chromium...")
 
     # Fallback to Chromium
-    logger.log("chromium_fallback", True, "🌐 Edge failed, falling back to bundled Chromium...")
-    res2 = _try_channel(None)
+    res2 = await _try_channel(None)
     if res2["status"] != "error":
         return res2
 
@@ -549,75 +684,61 @@ def run_signup(job_id: str, email: str, password: str, logger: JobLogger, headle
     logger.log("browser_launch_failed", False, "❌ Both Edge and Chromium failed to launch")
     return {"status": "failed", "screenshot": None, "error": "Could not launch any browser"}
 
-def resume_signup(job_id: str, logger: JobLogger):
+async def resume_signup(job_id: str, logger: JobLogger):
     """
     Resume a signup process that was waiting for human intervention.
     Uses the existing browser context if available.
     """
-    global _active_contexts
-    
     logger.log("resume_start", True, f"🔄 Attempting to resume job: {job_id}")
     
-    if job_id not in _active_contexts:
+    with _active_lock:
+        entry = _active_contexts.get(job_id)
+    if entry is None:
         logger.log("resume_no_context", False, "❌ No active browser context found for resume")
         return {"status": "error", "screenshot": None, "error": "Browser context not found"}
     
     try:
-        ctx = _active_contexts[job_id]
-        page = ctx.pages[0] if ctx.pages else ctx.new_page()
+        _, _, page = entry
         logger.log("resume_context_found", True, "✅ Found existing browser context")
         
         # Remove any existing banners
         try:
-            page.evaluate("""
-                const banners = document.querySelectorAll('[style*="position: fixed"][style*="top: 0"]');
-                banners.forEach(b => b.remove());
-            """)
+            await page.locator(_BANNER_LOCATOR_CSS).evaluate_all(_REMOVE_ALL_JS)
             logger.log("resume_banners_removed", True, "Removed existing banners")
         except Exception:
             logger.log("resume_banners_failed", False, "Failed to remove banners")
         
-        _wait_and_log(page, logger, 2.0, "After resume cleanup")
-        
-        # Get current page info
-        current_url = page.url
-        current_title = page.title()
-        logger.log("resume_current_page", True, f"Current page - URL: {current_url}, Title: {current_title}")
+        await _wait_for_document(page, logger, "After resume cleanup")
         
         # Re-analyze current page state
-        page_text = ""
-        try:
-            page_text = page.content()
-            logger.log("resume_page_content", True, f"Retrieved current page content ({len(page_text)} characters)")
-        except Exception as e:
-            logger.log("resume_content_failed", False, f"Failed to get page content: {e}")
+        state = await _page_state(page, logger)
+        current_url = state["url"]
+        current_title = state["title"]
+        page_text = state["text"]
+        logger.log("resume_current_page", True, f"Current page - URL: {current_url}, Title: {current_title}")
+        logger.log("resume_page_content", True, f"Retrieved current visible page text ({len(page_text)} characters)")
         
         # Check if CAPTCHA is still present
-        if _contains_captcha_text(page_text) or _is_protection_page(page):
+        if _contains_captcha_text(page_text) or _is_protection_page(state):
             logger.log("resume_still_captcha", False, "🧩 CAPTCHA still present after resume")
-            shot = _safe_screenshot(page, logger, "resume_captcha")
+            shot = await _safe_screenshot(page, logger, "resume_captcha")
             return {"status": "waiting_for_human", "screenshot": shot, "error": "CAPTCHA still present"}
         
         # Check for success
-        success_indicators = ["welcome", "congratulations", "account created", "success", "inbox", "outlook"]
-        page_text_lower = (page_text or "").lower()
-        current_url_lower = current_url.lower()
-        
-        is_success = any(indicator in page_text_lower for indicator in success_indicators) or \
-                   any(indicator in current_url_lower for indicator in ["outlook", "live.com/mail"])
+        is_success = _is_success_page(page_text, current_url)
         
         if is_success:
             logger.log("resume_success", True, "🎉 Account creation completed after resume!")
-            shot = _safe_screenshot(page, logger, "resume_success")
-            cleanup_context(job_id)
+            shot = await _safe_screenshot(page, logger, "resume_success")
+            await cleanup_context(job_id)
             return {"status": "completed", "screenshot": shot, "error": None}
         
         # Still unknown state
         logger.log("resume_still_unknown", False, "⚠️ Still in unknown state after resume")
-        shot = _safe_screenshot(page, logger, "resume_unknown")
+        shot = await _safe_screenshot(page, logger, "resume_unknown")
         return {"status": "waiting_for_human", "screenshot": shot, "error": "Still in unknown state"}
         
     except Exception as e:
         logger.log("resume_exception", False, f"❌ Resume failed with exception: {e}")
-        cleanup_context(job_id)
+        await cleanup_context(job_id)
         return {"status": "error", "screenshot": None, "error": str(e)}
\ No newline at end of file
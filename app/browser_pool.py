@@ -0,0 +1,352 @@
+# app/browser_pool.py
+"""
+Warm browser pool shared by signup jobs.
+- Starts Playwright once and keeps browsers alive between jobs.
+- Ephemeral mode (default): one launched browser per slot, a fresh context per job.
+- Persistent mode: one persistent-profile context per slot, shared by its job pages.
+- Slots host a few jobs each and are handed out round-robin.
+- Browsers are recycled after a number of jobs to bound memory growth.
+- Async: one Playwright driver per event loop (in practice one per process, see get_pool);
+  a semaphore bounds how many job contexts are open at once.
+- Launches are serialized and persistent profile dirs are claimed so pools/processes never share one.
+"""
+
+import asyncio, itertools, os, shutil, threading, time
+from functools import lru_cache
+from pathlib import Path
+from .logger import STORAGE
+
+try:
+    import fcntl
+except ImportError:  # Windows - Chromium's own profile lock still refuses a second launch
+    fcntl = None
+
+POOL_SIZE = 2               # browsers (or persistent contexts) per channel
+PAGES_PER_CONTEXT = 2       # concurrent jobs per browser
+MAX_JOBS_PER_CTX = 50       # recycle a context after this many jobs...
+MAX_CTX_AGE = 3600          # ...or after this many seconds, whichever comes first
+
+LAUNCH_ARGS = [
+    "--start-maximized",
+    "--disable-blink-features=AutomationControlled",
+    "--disable-web-security",
+    "--disable-features=VizDisplayCompositor"
+]
+# Extra work a throwaway browser doesn't need
+EPHEMERAL_ARGS = LAUNCH_ARGS + [
+    "--disable-dev-shm-usage",
+    "--disable-extensions",
+    "--disable-background-networking"
+]
+
+# Set on the context rather than per page, so navigator.userAgent matches the request header
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+              "Chrome/120.0.0.0 Safari/537.36 Edg/120.0.0.0")
+
+LAUNCH_TIMEOUT = 15000      # ms - a broken browser install should fail fast, not after 30s
+ACQUIRE_TIMEOUT = float(os.getenv("POOL_ACQUIRE_TIMEOUT", "300"))  # s a job may wait for a free slot
+
+PROFILES_DIR = STORAGE / "profiles"
+
+# Where the msedge channel looks for Edge on each platform
+EDGE_PATHS = [
+    r"C:\Program Files (x86)\Microsoft\Edge\Application\msedge.exe",
+    r"C:\Program Files\Microsoft\Edge\Application\msedge.exe",
+    "/Applications/Microsoft Edge.app/Contents/MacOS/Microsoft Edge",
+    "/opt/microsoft/msedge/msedge",
+]
+
+# Launch errors meaning the profile on disk is unusable (typically left behind by a crashed launch)
+_CORRUPT_PROFILE_MARKERS = ("EBUSY", "ProfileManager")
+
+# Profile claims are shared by every pool in the process (each event loop has its own pool)
+_PROFILE_LOCK = threading.Lock()
+_claimed_profiles = {}  # profile dir -> open .lock file (None without fcntl)
+
+
+def _claim_profile(base: Path) -> Path:
+    """Reserve a profile dir no other pool or process is using: base, then base-1, base-2, ..."""
+    with _PROFILE_LOCK:
+        for k in itertools.count():
+            profile = base if k == 0 else base.with_name(f"{base.name}-{k}")
+            if profile in _claimed_profiles:
+                continue
+            if not profile.exists():  # warm profiles already exist - one stat instead of stat + mkdir
+                profile.mkdir(parents=True, exist_ok=True)
+            lock_file = None
+            if fcntl is not None:
+                lock_file = open(profile / ".lock", "w")
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    lock_file.close()
+                    continue
+            _claimed_profiles[profile] = lock_file
+            return profile
+
+
+def _release_profile(profile: Path):
+    with _PROFILE_LOCK:
+        lock_file = _claimed_profiles.pop(profile, None)
+    if lock_file is not None:
+        lock_file.close()
+
+
+def _reset_profile(profile: Path):
+    """Wipe a profile's contents but keep its .lock so the claim stays held."""
+    for child in profile.iterdir():
+        if child.name == ".lock":
+            continue
+        if child.is_dir():
+            shutil.rmtree(child, ignore_errors=True)
+        else:
+            child.unlink(missing_ok=True)
+
+
+class PoolBusyError(RuntimeError):
+    """Every job slot stayed taken for ACQUIRE_TIMEOUT - another channel won't have one either."""
+
+
+class _Slot:
+    """One pooled browser: a launched Browser (ephemeral) or a persistent context."""
+
+    def __init__(self, channel, index: int, persistent: bool):
+        self.channel = channel
+        self.index = index
+        self.persistent = persistent
+        self.browser = None    # ephemeral mode
+        self.context = None    # persistent mode
+        self.active = 0        # jobs currently using the slot
+        self.job_count = 0     # jobs served since launch
+        self.created_at = 0.0  # monotonic launch time
+        self.profile_base = PROFILES_DIR / (channel or "chromium") / f"slot{index}"
+        self.user_data_dir = None  # claimed profile dir while a persistent context is open
+
+    @property
+    def alive(self) -> bool:
+        return (self.context if self.persistent else self.browser) is not None
+
+
+class BrowserPool:
+    def __init__(self, size: int = POOL_SIZE, pages_per_context: int = PAGES_PER_CONTEXT,
+                 max_jobs_per_ctx: int = MAX_JOBS_PER_CTX, max_ctx_age: float = MAX_CTX_AGE):
+        self.size = size
+        self.pages_per_context = pages_per_context
+        self.max_jobs_per_ctx = max_jobs_per_ctx
+        self.max_ctx_age = max_ctx_age
+        self._pw = None        # started by warm_up or the first launch
+        self._launch_lock = asyncio.Lock()  # serializes driver startup and browser launches
+        self._capacity = asyncio.Semaphore(size * pages_per_context)  # open job contexts
+        self._slots = {}       # (channel, persistent) -> [_Slot]
+        self._cursor = {}      # (channel, persistent) -> next slot index (round-robin)
+        self._by_context = {}  # id(context) -> _Slot
+
+    async def acquire(self, channel=None, persistent: bool = False, logger=None):
+        """
+        Return a browser context for one job on `channel` (None = bundled Chromium).
+        Ephemeral: a fresh context in a warm browser. Persistent: the slot's shared profile context.
+        Waits while the pool already has `size * pages_per_context` jobs open, and raises
+        PoolBusyError if none frees up within ACQUIRE_TIMEOUT (jobs waiting on a human hold theirs).
+        Slots are picked round-robin, preferring the least busy one, and launched lazily.
+        Idle browsers past their job or age limit are relaunched first (logged to `logger`).
+        Raises if the browser cannot be launched so callers can fall back to another channel.
+        """
+        try:
+            await asyncio.wait_for(self._capacity.acquire(), ACQUIRE_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise PoolBusyError(f"No free browser slot after {ACQUIRE_TIMEOUT:.0f}s") from None
+        try:
+            return await self._acquire_slot(channel, persistent, logger)
+        except BaseException:
+            self._capacity.release()
+            raise
+
+    def has_capacity(self) -> bool:
+        """True if acquire() would get a context without waiting."""
+        return not self._capacity.locked()
+
+    async def _acquire_slot(self, channel, persistent: bool, logger=None):
+        key = (channel, persistent)
+        slots = self._slots.get(key)
+        if slots is None:
+            slots = self._slots[key] = [_Slot(channel, i, persistent) for i in range(self.size)]
+        start = self._cursor.get(key, 0)
+        order = [slots[(start + k) % len(slots)] for k in range(len(slots))]
+        slot = min(order, key=lambda s: s.active)
+        self._cursor[key] = (slot.index + 1) % len(slots)
+
+        if slot.alive and slot.active == 0 and self._is_worn_out(slot):
+            if logger:
+                logger.log("browser_recycled", True,
+                    f"Recycling {channel or 'chromium'} browser {slot.index} after {slot.job_count} jobs, "
+                    f"{time.monotonic() - slot.created_at:.0f}s")
+            await self._close_slot(slot)
+        if not slot.alive:
+            await self._launch(slot, logger)
+
+        if slot.persistent:
+            ctx = slot.context
+        else:
+            ctx = await slot.browser.new_context(viewport=None, user_agent=USER_AGENT)
+            self._by_context[id(ctx)] = slot
+        slot.active += 1
+        return ctx
+
+    async def release(self, context):
+        """
+        Hand a context back after the job closed its page (ephemeral contexts are closed).
+        A persistent context keeps its warm profile (HTTP cache, fonts, service workers) but has
+        its cookies cleared once idle, so the next job doesn't start signed in as the last account.
+        """
+        self._capacity.release()
+        slot = self._by_context.get(id(context))
+        if slot is None:
+            return
+        if not slot.persistent:
+            del self._by_context[id(context)]
+            try:
+                await context.close()
+            except Exception:
+                pass
+        slot.active = max(0, slot.active - 1)
+        slot.job_count += 1
+        if slot.persistent and slot.active == 0:
+            try:
+                await context.clear_cookies()
+            except Exception:
+                pass
+
+    async def close(self):
+        """Close every browser and stop Playwright."""
+        for slots in self._slots.values():
+            for slot in slots:
+                await self._close_slot(slot)
+        if self._pw is not None:
+            try:
+                await self._pw.stop()
+            except Exception:
+                pass
+            self._pw = None
+
+    def _is_worn_out(self, slot: _Slot) -> bool:
+        """Long-lived browsers leak memory until screenshots silently stop - cap their lifetime."""
+        return (slot.job_count >= self.max_jobs_per_ctx
+                or time.monotonic() - slot.created_at > self.max_ctx_age)
+
+    async def warm_up(self, channel=None, launch: bool = False):
+        """
+        Start the Playwright driver ahead of the first job (and, with `launch`, the channel's
+        first browser) so no signup pays the cold start. Failures are left for acquire to report.
+        """
+        try:
+            async with self._launch_lock:
+                await self._start_driver()
+                if launch:
+                    key = (channel, False)
+                    slots = self._slots.setdefault(key, [_Slot(channel, i, False) for i in range(self.size)])
+                    if not slots[0].alive:
+                        await self._launch_locked(slots[0])
+        except Exception:
+            pass
+
+    async def _start_driver(self):
+        if self._pw is None:
+            # Imported on first use - playwright is heavy and importers may never start a browser
+            from playwright.async_api import async_playwright
+            self._pw = await async_playwright().start()
+
+    async def _launch(self, slot: _Slot, logger=None):
+        async with self._launch_lock:
+            await self._start_driver()
+            await self._launch_locked(slot, logger)
+
+    async def _launch_locked(self, slot: _Slot, logger=None):
+        if slot.persistent:
+            await self._launch_persistent(slot, logger)
+        else:
+            launch_kwargs = {"headless": False, "args": EPHEMERAL_ARGS, "timeout": LAUNCH_TIMEOUT}
+            if slot.channel:
+                launch_kwargs["channel"] = slot.channel
+            browser = await self._pw.chromium.launch(**launch_kwargs)
+            # The user may close the window while solving a CAPTCHA - forget the dead browser
+            browser.on("disconnected", lambda _: self._forget(slot, browser))
+            slot.browser = browser
+        slot.job_count = 0
+        slot.created_at = time.monotonic()
+
+    async def _launch_persistent(self, slot: _Slot, logger=None):
+        """Launch the slot's persistent context; profiles are per channel so a failed Edge launch can't taint Chromium."""
+        profile = _claim_profile(slot.profile_base)
+        ctx_kwargs = {
+            "user_data_dir": str(profile),
+            "headless": False,  # always show browser
+            "args": LAUNCH_ARGS,
+            "timeout": LAUNCH_TIMEOUT,
+            "user_agent": USER_AGENT,
+        }
+        if slot.channel:
+            ctx_kwargs["channel"] = slot.channel
+        try:
+            try:
+                ctx = await self._pw.chromium.launch_persistent_context(**ctx_kwargs)
+            except Exception as e:
+                if not any(m in str(e) for m in _CORRUPT_PROFILE_MARKERS):
+                    raise
+                if logger:
+                    logger.log("profile_reset", False, f"Profile {profile} looks corrupted, recreating it: {e}")
+                _reset_profile(profile)
+                ctx = await self._pw.chromium.launch_persistent_context(**ctx_kwargs)
+        except Exception:
+            _release_profile(profile)
+            raise
+        slot.user_data_dir = profile
+        # The user may close the window while solving a CAPTCHA - forget the dead context
+        ctx.on("close", lambda _: self._forget(slot, ctx))
+        slot.context = ctx
+        self._by_context[id(ctx)] = slot
+
+    def _forget(self, slot: _Slot, handle):
+        """Drop a closed browser/persistent context from its slot."""
+        self._by_context.pop(id(handle), None)
+        if slot.context is handle or slot.browser is handle:
+            slot.context = None
+            slot.browser = None
+            slot.active = 0
+            if slot.user_data_dir is not None:
+                _release_profile(slot.user_data_dir)
+                slot.user_data_dir = None
+
+    async def _close_slot(self, slot: _Slot):
+        handle = slot.context if slot.persistent else slot.browser
+        if handle is None:
+            return
+        self._forget(slot, handle)
+        try:
+            await handle.close()
+        except Exception:
+            pass
+
+
+@lru_cache(maxsize=None)
+def edge_available() -> bool:
+    """Cheap check for an Edge install so jobs can skip a launch that is bound to fail."""
+    return (any(os.path.exists(p) for p in EDGE_PATHS)
+            or any(shutil.which(name) for name in ("msedge", "microsoft-edge", "microsoft-edge-stable")))
+
+
+_pools = {}  # event loop -> BrowserPool (Playwright objects can't cross loops)
+
+def get_pool() -> BrowserPool:
+    """Return the running event loop's browser pool, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        pool = _pools[loop] = BrowserPool()
+    return pool
+
+
+async def close_pool():
+    """Close the running event loop's pool (call on shutdown)."""
+    pool = _pools.pop(asyncio.get_running_loop(), None)
+    if pool is not None:
+        await pool.close()
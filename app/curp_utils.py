@@ -1,10 +1,19 @@
 # app/curp_utils.py
-import random, string
+import random, secrets, string
 from datetime import datetime
 
+_PASSWORD_ALPHABET = (string.ascii_letters + string.digits + "!@#$%^&*").encode()
+# Largest multiple of the alphabet size that fits in a byte - bytes at or above it are
+# rejected so every character stays equally likely
+_PASSWORD_BYTE_LIMIT = (256 // len(_PASSWORD_ALPHABET)) * len(_PASSWORD_ALPHABET)
+
 def gen_password(n=12):
-    alphabet = string.ascii_letters + string.digits + "!@#$%^&*"
-    return ''.join(random.choice(alphabet) for _ in range(n))
+    # Account passwords: drawn from the OS CSPRNG in bulk rather than one random.choice per character
+    alphabet, limit = _PASSWORD_ALPHABET, _PASSWORD_BYTE_LIMIT
+    out = bytearray()
+    while len(out) < n:
+        out += bytes(alphabet[b % len(alphabet)] for b in secrets.token_bytes(2 * n) if b < limit)
+    return out[:n].decode()
 
 def gen_email_from_curp(curp: str, domain="outlook.com"):
     # deterministic-ish + random suffix
@@ -0,0 +1,121 @@
+# app/jobs.py
+"""
+Signup job state.
+- One Job per request; status transitions go through Job.set_status so the status,
+  account creation status and browser flag always change together.
+- to_dict() keeps the JSON shape the Streamlit UI reads.
+- Only the newest MAX_JOB_LOGS log entries are kept, so repeated resumes can't grow a job forever.
+"""
+
+from collections import deque
+from dataclasses import dataclass, field
+import hashlib, itertools
+import orjson
+from typing import Any, Deque, Dict, Optional, Sequence
+
+MAX_JOB_LOGS = 2000
+
+# status -> (creation_status, browser_open) it implies; None keeps the current value.
+# Statuses not listed (e.g. "error") become the creation status with the browser closed.
+_TRANSITIONS = {
+    "queued": ("pending", False),
+    "running": (None, True),
+    "resuming": (None, None),
+    "completed": ("success", False),
+    "waiting_for_human": ("waiting_for_captcha", True),  # browser stays open for the CAPTCHA
+    "failed": ("failed", False),
+}
+
+# Statuses a job can still leave: it is queued, holds a worker, or has a browser waiting on a human
+ACTIVE_STATUSES = ("queued", "running", "resuming", "waiting_for_human")
+
+
+@dataclass
+class Job:
+    job_id: str
+    curp: str
+    email: str
+    password: str
+    status: str = "queued"
+    creation_status: str = "pending"
+    browser_open: bool = False
+    captcha_screenshot: Optional[str] = None
+    step_index: int = 0
+    logs: Deque[Dict[str, Any]] = field(default_factory=lambda: deque(maxlen=MAX_JOB_LOGS))
+    logs_raw: Deque[str] = field(default_factory=lambda: deque(maxlen=MAX_JOB_LOGS))  # the JSON lines JobLogger already encoded
+    _logs_added: int = field(default=0, repr=False, compare=False)  # total ever added; len() stops at the cap
+    # (state key, encoded to_dict(), ETag) - the UI polls a job far more often than it changes
+    _response_cache: Optional[tuple] = field(default=None, repr=False, compare=False)
+
+    def set_status(self, status: str, creation_status: Optional[str] = None):
+        """Move to `status`; `creation_status` overrides the one the transition implies."""
+        implied_creation, browser_open = _TRANSITIONS.get(status, (status, False))
+        self.status = status
+        if creation_status or implied_creation:
+            self.creation_status = creation_status or implied_creation
+        if browser_open is not None:
+            self.browser_open = browser_open
+
+    def add_logs(self, entries: Sequence[Dict[str, Any]], lines: Sequence[str]):
+        """Append a logger's entries and their encoded lines (JobLogger.entries / .lines)."""
+        self.logs.extend(entries)
+        self.logs_raw.extend(lines)
+        self._logs_added += len(entries)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "email": self.email,
+            "browser_open": self.browser_open,
+            "creation_status": self.creation_status
+        }
+
+    def _encoded(self) -> tuple:
+        key = (self.status, self.creation_status, self.browser_open, self.captcha_screenshot,
+               self.step_index, self._logs_added)
+        if self._response_cache is None or self._response_cache[0] != key:
+            body = orjson.dumps(self.to_dict())
+            self._response_cache = (key, body, '"%s"' % hashlib.blake2b(body, digest_size=8).hexdigest())
+        return self._response_cache
+
+    def to_json(self, since_seq: Optional[int] = None) -> bytes:
+        """
+        Encoded to_dict(since_seq), re-encoded only when the job's state or log count has changed.
+        A `since_seq` that skips no stored entries is served from the cache too.
+        """
+        if since_seq is not None and since_seq > self._logs_added - len(self.logs):
+            return orjson.dumps(self.to_dict(since_seq))  # a delta is small and differs per client
+        return self._encoded()[1]  # nothing to skip: the delta is the full payload
+
+    def etag(self) -> str:
+        """Quoted ETag of to_json(); changes exactly when the encoded job does."""
+        return self._encoded()[2]
+
+    def to_dict(self, since_seq: Optional[int] = None) -> Dict[str, Any]:
+        """
+        The API's job payload. Log entries are numbered from 0 in the order they were added and
+        `next_seq` is the number of the next one; `since_seq` limits logs/logs_raw to entries from there on.
+        """
+        logs, logs_raw = self.logs, self.logs_raw
+        if since_seq is not None:
+            skip = max(0, since_seq - (self._logs_added - len(self.logs)))  # older entries have rolled off
+            logs, logs_raw = itertools.islice(logs, skip, None), itertools.islice(logs_raw, skip, None)
+        return {
+            "job_id": self.job_id,
+            "curp": self.curp,
+            "email": self.email,
+            "password": self.password,
+            "status": self.status,
+            "logs": list(logs),
+            "created_account": {
+                "email": self.email,
+                "password": self.password,
+                "creation_status": self.creation_status
+            },
+            "captcha_screenshot": self.captcha_screenshot,
+            "step_index": self.step_index,
+            "logs_raw": list(logs_raw),
+            "next_seq": self._logs_added,
+            "browser_open": self.browser_open
+        }
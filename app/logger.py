@@ -1,19 +1,61 @@
 # app/logger.py
-import json
-from datetime import datetime
+import atexit, threading, time
+import orjson
 from pathlib import Path
 
 STORAGE = Path(__file__).parent / "storage"
 STORAGE.mkdir(parents=True, exist_ok=True)
 
+# Log lines are written in batches: when this many are pending, or after the flush interval
+LOG_BATCH_SIZE = 32
+LOG_FLUSH_INTERVAL = 0.2  # seconds
+
+_dirty = set()  # loggers with unwritten lines, drained by the flusher thread
+_dirty_lock = threading.Lock()
+_flusher = None
+
+_ts_cache = (None, "")  # (unix second, "YYYY-MM-DDTHH:MM:SS" prefix), rebuilt when the second rolls over
+
 def now_iso():
-    return datetime.utcnow().isoformat() + "Z"
+    """UTC timestamp with microseconds, e.g. 2024-01-01T12:00:00.123456Z."""
+    global _ts_cache
+    sec, micros = divmod(time.time_ns() // 1000, 1_000_000)
+    cached_sec, prefix = _ts_cache
+    if sec != cached_sec:
+        prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(sec))
+        _ts_cache = (sec, prefix)
+    return f"{prefix}.{micros:06d}Z"
+
+def _flush_loop():
+    while True:
+        time.sleep(LOG_FLUSH_INTERVAL)
+        _flush_dirty()
+
+def _flush_dirty():
+    with _dirty_lock:
+        loggers = list(_dirty)
+        _dirty.clear()
+    for lg in loggers:
+        lg.flush()
+
+def _start_flusher():
+    global _flusher
+    with _dirty_lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_flush_loop, name="joblog-flusher", daemon=True)
+            _flusher.start()
+            atexit.register(_flush_dirty)
 
 class JobLogger:
     def __init__(self, job_id: str):
         self.job_id = job_id
         self.path = STORAGE / f"{job_id}.log.jsonl"
         self.entries = []
+        self.lines = []       # entries as encoded JSON lines (no newline), in step with `entries`
+        self._fh = None       # opened (binary) on first flush, kept open until close()
+        self._pending = []    # encoded lines (bytes) not yet written
+        self._lock = threading.Lock()
+        _start_flusher()
 
     def log(self, step: str, success: bool, message: str, extra: dict = None):
         entry = {
@@ -24,12 +66,39 @@ class JobLogger:
             "extra": extra or {}
         }
         self.entries.append(entry)
-        with open(self.path, "a", encoding="utf-8") as f:
-            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        # orjson emits UTF-8 bytes directly - written as-is, decoded once for the API's logs_raw
+        line = orjson.dumps(entry)
+        self.lines.append(line.decode())
+        with self._lock:
+            self._pending.append(line)
+            full = len(self._pending) >= LOG_BATCH_SIZE
+        if full:
+            self.flush()
+        else:
+            with _dirty_lock:
+                _dirty.add(self)
         return entry
 
-    def save_screenshot(self, img_bytes: bytes, name_suffix="captcha.png"):
-        out = STORAGE / f"{self.job_id}_{name_suffix}"
-        with open(out, "wb") as f:
-            f.write(img_bytes)
-        return str(out)
+    def flush(self):
+        """Write all pending lines with a single write call (no fsync - logs aren't crash-critical)."""
+        with self._lock:
+            if not self._pending:
+                return
+            if self._fh is None:
+                self._fh = open(self.path, "ab", buffering=1 << 16)
+            self._fh.write(b"\n".join(self._pending) + b"\n")
+            self._pending.clear()
+            self._fh.flush()
+
+    def close(self):
+        """Flush remaining lines and release the file handle (a later log() reopens it)."""
+        self.flush()
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+        with _dirty_lock:
+            _dirty.discard(self)
+
+    def path_for_shot(self, name_suffix="captcha.jpg") -> Path:
+        return STORAGE / f"{self.job_id}_{name_suffix}"
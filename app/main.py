@@ -1,18 +1,23 @@
 # app/main.py
-import sys, asyncio, json
+import os, sys, asyncio
 from uuid import uuid4
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor
 
-from fastapi import FastAPI, BackgroundTasks, HTTPException
+from fastapi import FastAPI, BackgroundTasks, HTTPException, Request
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import Dict, Optional
 
-from .automation import run_signup, resume_signup, cleanup_context
+import orjson
+
+from .automation import run_signup, resume_signup, cleanup_context, active_job_ids
+from .browser_pool import get_pool, close_pool, edge_available
 from .logger import JobLogger
+from .jobs import Job, ACTIVE_STATUSES
+from . import store
+from .worker import submit, queue_depth, start_workers, stop_workers, PRIORITY_RESUME, PRIORITY_SIGNUP
 from .curp_utils import gen_email_from_curp, gen_password
-from .utils import save_screenshot_blob
 
 # Ensure Windows compatibility
 if sys.platform.startswith("win"):
@@ -21,13 +26,55 @@ if sys.platform.startswith("win"):
 STORAGE = Path(__file__).parent / "storage"
 STORAGE.mkdir(exist_ok=True)
 
-app = FastAPI()
-executor = ThreadPoolExecutor(max_workers=2)
+# orjson serializes the job payloads (growing log lists) far faster than the stdlib encoder
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # Serve static files (screenshots etc.)
 app.mount("/static", StaticFiles(directory=STORAGE), name="static")
 
-JOBS: Dict[str, Dict[str, Any]] = {}
+# Jobs that can still change; finished ones live only in the SQLite store
+JOBS: Dict[str, Job] = {}
+# Set (and dropped) on the job's next change, waking /jobs/{id}/events streams
+_CHANGED: Dict[str, asyncio.Event] = {}
+
+# Seconds between keep-alive comments on an idle event stream
+EVENTS_KEEPALIVE = 15
+# Upper bound on GET /jobs/{id}?wait=, so a long poll can't pin a connection indefinitely
+MAX_LONG_POLL = 60
+
+
+def _persist(job: Job, logger: Optional[JobLogger] = None):
+    """Save the job (plus the logger's entries, if given) to the store; finished jobs leave memory."""
+    if logger is not None:
+        job.add_logs(logger.entries, logger.lines)
+        store.append_logs(job.job_id, logger.entries, logger.lines)
+    store.save_job(job)
+    if job.status not in ACTIVE_STATUSES and not job.browser_open:
+        JOBS.pop(job.job_id, None)
+    changed = _CHANGED.pop(job.job_id, None)
+    if changed:
+        changed.set()
+
+
+def _get_job(job_id: str) -> Job:
+    job = JOBS.get(job_id) or store.load_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="job not found")
+    return job
+
+
+# Set PREWARM_BROWSER=1 to also open the first browser window at startup (the driver always starts)
+PREWARM_BROWSER = os.getenv("PREWARM_BROWSER") == "1"
+
+
+@app.on_event("startup")
+async def startup_event():
+    # Jobs a previous process left unfinished lost their queue slot and browser with it
+    store.fail_unfinished(ACTIVE_STATUSES)
+    start_workers()
+    # Warm the pool in the background so startup isn't held up by a browser launch
+    channel = "msedge" if edge_available() else None
+    app.state.warmup_task = asyncio.create_task(get_pool().warm_up(channel, launch=PREWARM_BROWSER))
 
 
 class JobRequest(BaseModel):
@@ -40,163 +87,165 @@ async def create_job(req: JobRequest, background_tasks: BackgroundTasks):
     email = gen_email_from_curp(req.curp)
     password = gen_password()
 
-    job = {
-        "job_id": job_id,
-        "curp": req.curp,
-        "email": email,
-        "password": password,
-        "status": "queued",
-        "logs": [],
-        "created_account": {
-            "email": email,
-            "password": password,
-            "creation_status": "pending"
-        },
-        "captcha_screenshot": None,
-        "user_data_dir": str(STORAGE / f"{job_id}_profile"),
-        "step_index": 0,
-        "logs_raw": [],
-        "browser_open": False
-    }
+    job = Job(job_id=job_id, curp=req.curp, email=email, password=password)
     JOBS[job_id] = job
+    _persist(job)
 
-    def _run():
+    async def _run():
         logger = JobLogger(job_id)
-        job["status"] = "running"
-        job["browser_open"] = True
+        job.set_status("running")
+        _persist(job)
         
         try:
             logger.log("job_start", True, f"Starting signup for {email}")
-            result = run_signup(job_id, email, password, logger, headless=False)
-            
-            job["logs"] = logger.entries
-            job["logs_raw"] = [json.dumps(e, ensure_ascii=False) for e in job["logs"]]
-            job["status"] = result["status"]
+            result = await run_signup(job_id, email, password, logger, headless=False)
             
-            # Update account creation status
-            if result["status"] == "completed":
-                job["created_account"]["creation_status"] = "success"
-                job["browser_open"] = False
-            elif result["status"] == "waiting_for_human":
-                job["created_account"]["creation_status"] = "waiting_for_captcha"
-                job["browser_open"] = True  # Browser stays open for CAPTCHA
-            else:
-                job["created_account"]["creation_status"] = result["status"]
-                job["browser_open"] = False
+            job.set_status(result["status"])
             
-            # Save screenshot if available
+            # Automation already saved the screenshot
             if result.get("screenshot"):
-                out_path = STORAGE / f"{job_id}_captcha.png"
-                screenshot_url = save_screenshot_blob(result["screenshot"], out_path)
-                job["captcha_screenshot"] = screenshot_url
+                job.captcha_screenshot = result["screenshot"]
                 
         except Exception as e:
             logger.log("fatal_error", False, f"{e}")
-            job["status"] = "failed"
-            job["browser_open"] = False
-            job["created_account"]["creation_status"] = "failed"
-
-    executor.submit(_run)
+            job.set_status("failed")
+        finally:
+            logger.close()
+            _persist(job, logger)
+
+    # Wait in the queue, not on a worker, while every browser slot is taken - jobs waiting
+    # for a CAPTCHA hold theirs, and their resumes need a worker to get through
+    submit(PRIORITY_SIGNUP, job_id, _run, ready=lambda: get_pool().has_capacity())
     return {"job_id": job_id, "status": "queued", "email": email}
 
 
 @app.get("/jobs/{job_id}")
-async def get_job(job_id: str):
-    job = JOBS.get(job_id)
-    if not job:
-        raise HTTPException(status_code=404, detail="job not found")
-    return job
+async def get_job(job_id: str, request: Request, wait: float = 0, etag: Optional[str] = None,
+                  since_seq: Optional[int] = None):
+    """
+    The job as JSON, with an ETag. Long poll: when `etag` (or If-None-Match) still matches, the request
+    is held until the job changes or `wait` seconds pass, and an unchanged job gets 304.
+    `since_seq` returns only the log entries from that number on (see Job.to_dict).
+    """
+    job = _get_job(job_id)
+    since = etag or request.headers.get("if-none-match")
+    if since and wait > 0:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + min(wait, MAX_LONG_POLL)
+        while job_id in JOBS:
+            changed = _CHANGED.setdefault(job_id, asyncio.Event())  # before the check, so no change is missed
+            remaining = deadline - loop.time()
+            if job.etag() != since or remaining <= 0:
+                break
+            try:
+                await asyncio.wait_for(changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                break
+    if since == job.etag():
+        return Response(status_code=304, headers={"ETag": since})
+    return Response(content=job.to_json(since_seq), media_type="application/json", headers={"ETag": job.etag()})
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """
+    Server-sent events: the job's summary (plus its ETag, as on GET /jobs/{id}) now and after every
+    change, closed once the job is finished.
+    """
+    _get_job(job_id)
+
+    async def stream():
+        while True:
+            changed = _CHANGED.setdefault(job_id, asyncio.Event())  # before the snapshot, so no change is missed
+            job = JOBS.get(job_id) or store.load_job(job_id)
+            yield b"data: " + orjson.dumps({**job.summary(), "etag": job.etag()}) + b"\n\n"
+            if job_id not in JOBS:
+                _CHANGED.pop(job_id, None)
+                return
+            while True:
+                try:
+                    await asyncio.wait_for(changed.wait(), EVENTS_KEEPALIVE)
+                    break
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
 
 
 @app.post("/jobs/{job_id}/resume")
 async def resume_job(job_id: str):
-    job = JOBS.get(job_id)
-    if not job:
-        raise HTTPException(status_code=404, detail="job not found")
-    if job["status"] != "waiting_for_human":
+    job = _get_job(job_id)
+    if job.status != "waiting_for_human":
         raise HTTPException(
             status_code=400,
-            detail=f"Job not in waiting_for_human state (current={job['status']})"
+            detail=f"Job not in waiting_for_human state (current={job.status})"
         )
 
-    def _resume():
+    async def _resume():
         logger = JobLogger(job_id)
-        job["status"] = "resuming"
+        job.set_status("resuming")
+        _persist(job)
         
         try:
             logger.log("resume_start", True, "Resuming job from human intervention")
-            result = resume_signup(job_id, logger)
+            result = await resume_signup(job_id, logger)
             
-            # Append new logs to existing ones
-            job["logs"].extend(logger.entries)
-            job["logs_raw"].extend([json.dumps(e, ensure_ascii=False) for e in logger.entries])
-            job["status"] = result["status"]
-            
-            # Update account status
-            if result["status"] == "completed":
-                job["created_account"]["creation_status"] = "success"
-                job["browser_open"] = False
-            elif result["status"] == "waiting_for_human":
-                job["created_account"]["creation_status"] = "still_waiting_for_captcha"
-                job["browser_open"] = True
+            if result["status"] == "waiting_for_human":
+                job.set_status(result["status"], creation_status="still_waiting_for_captcha")
             else:
-                job["created_account"]["creation_status"] = result["status"]
-                job["browser_open"] = False
+                job.set_status(result["status"])
             
-            # Save resume screenshot if available
+            # Automation already saved the resume screenshot
             if result.get("screenshot"):
-                out_path = STORAGE / f"{job_id}_captcha_resume.png"
-                screenshot_url = save_screenshot_blob(result["screenshot"], out_path)
-                job["captcha_screenshot"] = screenshot_url
+                job.captcha_screenshot = result["screenshot"]
                 
         except Exception as e:
             logger.log("resume_exception", False, str(e))
-            job["status"] = "failed"
-            job["browser_open"] = False
-            job["created_account"]["creation_status"] = "resume_failed"
+            job.set_status("failed", creation_status="resume_failed")
+        finally:
+            logger.close()
+            # Append new logs to existing ones (the oldest roll off past MAX_JOB_LOGS)
+            _persist(job, logger)
 
-    executor.submit(_resume)
+    submit(PRIORITY_RESUME, job_id, _resume)
     return {"job_id": job_id, "status": "resuming"}
 
 
 @app.delete("/jobs/{job_id}/browser")
 async def close_browser(job_id: str):
     """Manually close the browser context for a job."""
-    job = JOBS.get(job_id)
-    if not job:
-        raise HTTPException(status_code=404, detail="job not found")
+    job = _get_job(job_id)
     
     try:
-        cleanup_context(job_id)
-        job["browser_open"] = False
+        await cleanup_context(job_id)
+        job.browser_open = False
+        _persist(job)
         return {"job_id": job_id, "message": "Browser closed"}
     except Exception as e:
         return {"job_id": job_id, "error": str(e)}
 
 
 @app.get("/jobs")
-async def list_jobs():
-    """List all jobs with basic info."""
-    return {
-        "jobs": [
-            {
-                "job_id": job["job_id"],
-                "status": job["status"],
-                "email": job["email"],
-                "browser_open": job.get("browser_open", False),
-                "creation_status": job["created_account"]["creation_status"]
-            }
-            for job in JOBS.values()
-        ]
-    }
+async def list_jobs(limit: Optional[int] = None, focus: Optional[str] = None, since_seq: Optional[int] = None):
+    """
+    List all jobs (or the newest `limit`) with basic info, oldest first.
+    `focus` also returns that job (as GET /jobs/{id}?since_seq= would).
+    """
+    body = {"jobs": store.list_summaries(limit), "queued": queue_depth()}
+    if focus:
+        job = JOBS.get(focus) or store.load_job(focus)
+        body["focus"] = job.to_dict(since_seq) if job else None
+        body["focus_etag"] = job.etag() if job else None
+    return body
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    """Clean up all browser contexts on shutdown."""
-    from .automation import _active_contexts
-    for job_id in list(_active_contexts.keys()):
+    """Stop the job workers (cancelling running jobs) and clean up all browser contexts on shutdown."""
+    await stop_workers()
+    for job_id in active_job_ids():
         try:
-            cleanup_context(job_id)
+            await cleanup_context(job_id)
         except Exception:
-            pass
\ No newline at end of file
+            pass
+    await close_pool()
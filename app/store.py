@@ -0,0 +1,132 @@
+# app/store.py
+"""
+SQLite job store.
+- Every job and its log entries are written here; main.JOBS only holds jobs that are still
+  queued, running or waiting on a human, so a long-running server doesn't keep every log in RAM.
+- Jobs survive a restart: GET /jobs/{id} and GET /jobs read finished jobs from the database.
+- The JSONL file each JobLogger writes stays as the plain-text mirror of the logs.
+"""
+
+import os, sqlite3, time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import orjson
+
+from .jobs import Job, MAX_JOB_LOGS
+
+DB_PATH = Path(os.getenv("JOBS_DB", Path(__file__).parent / "storage" / "jobs.db"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    curp TEXT NOT NULL,
+    email TEXT NOT NULL,
+    password TEXT NOT NULL,
+    status TEXT NOT NULL,
+    creation_status TEXT NOT NULL,
+    browser_open INTEGER NOT NULL,
+    captcha_screenshot TEXT,
+    step_index INTEGER NOT NULL,
+    created_ts REAL NOT NULL,
+    updated_ts REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_logs (
+    job_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    ts TEXT NOT NULL,
+    step TEXT NOT NULL,
+    success INTEGER NOT NULL,
+    message TEXT NOT NULL,
+    raw TEXT NOT NULL,  -- the JSON line JobLogger encoded, served back as logs_raw
+    PRIMARY KEY (job_id, seq)
+);
+"""
+
+_conn: Optional[sqlite3.Connection] = None
+
+
+def _db() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+        # Only the API's event loop thread uses the connection
+        _conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+        # WAL + NORMAL: appends don't fsync on every commit, readers don't block the writer
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute("PRAGMA synchronous=NORMAL")
+        _conn.executescript(_SCHEMA)
+    return _conn
+
+
+def save_job(job: Job):
+    """Insert or update the job's row (logs are appended separately with append_logs)."""
+    now = time.time()
+    with _db() as db:
+        db.execute(
+            """INSERT INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT(job_id) DO UPDATE SET
+                   status=excluded.status, creation_status=excluded.creation_status,
+                   browser_open=excluded.browser_open, captcha_screenshot=excluded.captcha_screenshot,
+                   step_index=excluded.step_index, updated_ts=excluded.updated_ts""",
+            (job.job_id, job.curp, job.email, job.password, job.status, job.creation_status,
+             job.browser_open, job.captcha_screenshot, job.step_index, now, now),
+        )
+
+
+def append_logs(job_id: str, entries: Sequence[Dict[str, Any]], lines: Sequence[str]):
+    """Append a logger's entries and their encoded lines (JobLogger.entries / .lines)."""
+    if not entries:
+        return
+    with _db() as db:
+        (last,) = db.execute("SELECT COALESCE(MAX(seq), -1) FROM job_logs WHERE job_id = ?", (job_id,)).fetchone()
+        db.executemany(
+            "INSERT INTO job_logs VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(job_id, last + 1 + i, e["timestamp"], e["step"], e["success"], e["message"], raw)
+             for i, (e, raw) in enumerate(zip(entries, lines))],
+        )
+
+
+def load_job(job_id: str) -> Optional[Job]:
+    """Rebuild a job and its newest MAX_JOB_LOGS log entries, or None if it was never stored."""
+    db = _db()
+    row = db.execute(
+        """SELECT job_id, curp, email, password, status, creation_status, browser_open,
+                  captcha_screenshot, step_index FROM jobs WHERE job_id = ?""",
+        (job_id,),
+    ).fetchone()
+    if row is None:
+        return None
+    job = Job(*row[:6], browser_open=bool(row[6]), captcha_screenshot=row[7], step_index=row[8])
+    lines = [raw for (raw,) in db.execute(
+        "SELECT raw FROM (SELECT seq, raw FROM job_logs WHERE job_id = ? ORDER BY seq DESC LIMIT ?) ORDER BY seq",
+        (job_id, MAX_JOB_LOGS),
+    )]
+    job.add_logs([orjson.loads(raw) for raw in lines], lines)
+    # Keep log numbering (Job.to_dict's next_seq) as it was in memory, even when older entries were cut
+    (job._logs_added,) = db.execute("SELECT COUNT(*) FROM job_logs WHERE job_id = ?", (job_id,)).fetchone()
+    return job
+
+
+def list_summaries(limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Job.summary() rows for every stored job (or the newest `limit`), oldest first."""
+    rows = _db().execute(
+        """SELECT * FROM (SELECT job_id, status, email, browser_open, creation_status, created_ts FROM jobs
+                          ORDER BY created_ts DESC LIMIT ?) ORDER BY created_ts""",
+        (-1 if limit is None else limit,),  # LIMIT -1: no limit
+    )
+    return [
+        {"job_id": job_id, "status": status, "email": email,
+         "browser_open": bool(browser_open), "creation_status": creation_status}
+        for job_id, status, email, browser_open, creation_status, _ in rows
+    ]
+
+
+def fail_unfinished(statuses: Sequence[str]):
+    """Mark jobs left in `statuses` by a previous process as failed - their browser and queue are gone."""
+    with _db() as db:
+        db.execute(
+            f"""UPDATE jobs SET status = 'failed', creation_status = 'interrupted', browser_open = 0,
+                   updated_ts = ? WHERE status IN ({",".join("?" * len(statuses))})""",
+            (time.time(), *statuses),
+        )
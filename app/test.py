@@ -6,17 +6,73 @@ Run this to test browser launching and visible field filling.
 
 import sys
 import time
+import asyncio
 from pathlib import Path
 
 # Add the app directory to path
 sys.path.append(str(Path(__file__).parent))
 
-from app.automation import run_signup
+from app.automation import run_signup, resume_signup
+from app.browser_pool import close_pool
 from app.logger import JobLogger
 from app.curp_utils import gen_email_from_curp, gen_password
 
+async def _print_resume(job_id: str):
+    """Resume the job on the loop that still holds its browser, then print the outcome."""
+    logger = JobLogger(job_id + "_resume")
+    result = await resume_signup(job_id, logger)
+    
+    print("📊 RESUME RESULT:")
+    print(f"   Status: {result['status']}")
+    print(f"   Error: {result.get('error', 'None')}")
+    
+    # Print logs
+    print()
+    print("📋 Resume logs:")
+    for log_entry in logger.entries:
+        icon = "✅" if log_entry["success"] else "❌"
+        print(f"   {icon} {log_entry['step']}: {log_entry['message']}")
+    logger.close()
+    return result
+
+async def _signup_and_resume(job_id: str, email: str, password: str, logger: JobLogger):
+    """
+    Signup and any resumes on one event loop: the browser pool (and with it the job's open
+    browser) belongs to the loop that created it, and is closed before the loop ends.
+    """
+    try:
+        result = await run_signup(job_id, email, password, logger, headless=False)
+        
+        print("📊 RESULT:")
+        print(f"   Status: {result['status']}")
+        print(f"   Error: {result.get('error', 'None')}")
+        print(f"   Screenshot: {'Yes' if result.get('screenshot') else 'No'}")
+        
+        if result["status"] == "waiting_for_human":
+            print()
+            print("⚠️  CAPTCHA/Protection detected!")
+            print("   The browser should still be open.")
+            print("   1. Solve any CAPTCHAs in the browser")
+            print("   2. Press Enter here to resume (or type q to quit)")
+            while result["status"] == "waiting_for_human":
+                answer = await asyncio.to_thread(input, "\nResume? [Enter/q]: ")
+                if answer.strip().lower() == "q":
+                    break
+                print(f"🔄 Testing resume for job: {job_id}")
+                result = await _print_resume(job_id)
+        
+        elif result["status"] == "completed":
+            print()
+            print("🎉 SUCCESS! Account creation completed!")
+            
+        elif result["status"] == "failed":
+            print()
+            print("❌ FAILED! Check the logs above.")
+    finally:
+        await close_pool()
+
 def test_automation():
-    """Test the automation with a dummy CURP."""
+    """Test the automation with a dummy CURP, resuming after a CAPTCHA in the same run."""
     
     print("🚀 Testing improved Outlook automation...")
     print("=" * 50)
@@ -44,37 +100,7 @@ def test_automation():
     print()
     
     try:
-        # Run automation
-        result = run_signup(job_id, email, password, logger, headless=False)
-        
-        print("📊 RESULT:")
-        print(f"   Status: {result['status']}")
-        print(f"   Error: {result.get('error', 'None')}")
-        print(f"   Screenshot: {'Yes' if result.get('screenshot') else 'No'}")
-        
-        if result["status"] == "waiting_for_human":
-            print()
-            print("⚠️  CAPTCHA/Protection detected!")
-            print("   The browser should still be open.")
-            print("   You can now:")
-            print("   1. Solve any CAPTCHAs in the browser")
-            print("   2. Use the Streamlit UI to resume")
-            print("   3. Or run this script again to test resume")
-        
-        elif result["status"] == "completed":
-            print()
-            print("🎉 SUCCESS! Account creation completed!")
-            
-        elif result["status"] == "failed":
-            print()
-            print("❌ FAILED! Check the logs above.")
-            
-        # Print recent logs
-        print()
-        print("📋 Recent logs:")
-        for log_entry in logger.entries[-5:]:  # Last 5 logs
-            icon = "✅" if log_entry["success"] else "❌"
-            print(f"   {icon} {log_entry['step']}: {log_entry['message']}")
+        asyncio.run(_signup_and_resume(job_id, email, password, logger))
             
     except KeyboardInterrupt:
         print("\n⏹️  Test interrupted by user")
@@ -83,53 +109,27 @@ def test_automation():
         print(f"\n❌ Test failed with exception: {e}")
         import traceback
         traceback.print_exc()
-
-def test_resume():
-    """Test the resume functionality."""
-    
-    job_id = input("Enter job ID to resume: ").strip()
-    if not job_id:
-        print("❌ No job ID provided")
-        return
-        
-    print(f"🔄 Testing resume for job: {job_id}")
-    
-    from app.automation import resume_signup
-    logger = JobLogger(job_id + "_resume")
     
-    try:
-        result = resume_signup(job_id, logger)
-        
-        print("📊 RESUME RESULT:")
-        print(f"   Status: {result['status']}")
-        print(f"   Error: {result.get('error', 'None')}")
-        
-        # Print logs
+    finally:
+        # Print recent logs
         print()
-        print("📋 Resume logs:")
-        for log_entry in logger.entries:
+        print("📋 Recent logs:")
+        for log_entry in logger.entries[-5:]:  # Last 5 logs
             icon = "✅" if log_entry["success"] else "❌"
             print(f"   {icon} {log_entry['step']}: {log_entry['message']}")
-            
-    except Exception as e:
-        print(f"❌ Resume test failed: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.close()
 
 if __name__ == "__main__":
     print("🤖 Outlook Automation Test Suite")
     print("=" * 40)
-    print("1. Test new signup")
-    print("2. Test resume functionality") 
-    print("3. Exit")
+    print("1. Test new signup (resume after a CAPTCHA in the same run)")
+    print("2. Exit")
     
-    choice = input("\nEnter choice (1-3): ").strip()
+    choice = input("\nEnter choice (1-2): ").strip()
     
     if choice == "1":
         test_automation()
     elif choice == "2":
-        test_resume()
-    elif choice == "3":
         print("👋 Goodbye!")
     else:
         print("❌ Invalid choice")
\ No newline at end of file
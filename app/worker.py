@@ -1,81 +1,65 @@
 # app/worker.py
-import threading, queue, uuid, time
-from .logger import JobLogger
-from .curp_utils import gen_email_from_curp, gen_password
-from .automation import run_signup
+"""
+Background job scheduler for the API.
+- Jobs wait in one priority queue and are drained by a fixed set of worker coroutines
+  (MAX_CONCURRENT_JOBS), which is also the concurrency limit.
+- Resumes jump ahead of fresh signups: a user is watching the CAPTCHA they just solved.
+- A job can be held back until it is `ready` (e.g. a browser slot is free); it goes back in
+  line instead of tying up a worker, so resumes and other jobs keep running meanwhile.
+"""
 
-JOB_QUEUE = queue.Queue()
-JOBS = {}  # job_id -> dict
+import asyncio, itertools, os
 
-_worker_thread = None
+MAX_CONCURRENT_JOBS = int(os.getenv("MAX_CONCURRENT_JOBS", "2"))
 
-def _worker_loop():
-    while True:
-        job_data = JOB_QUEUE.get()
-        if job_data is None:
-            break
-        job_id = job_data["job_id"]
-        curp = job_data["curp"]
+PRIORITY_RESUME = 0
+PRIORITY_SIGNUP = 1
+
+RETRY_DELAY = 0.5  # s a worker pauses after putting back a job that isn't ready
+
+_queue = asyncio.PriorityQueue()  # (priority, seq, job_id, coroutine function, ready check)
+_seq = itertools.count()          # FIFO within a priority; also keeps tuples from comparing functions
+_workers = set()
+
+
+def submit(priority: int, job_id: str, fn, ready=None):
+    """
+    Queue `fn` (an async function taking no arguments) to run on the next free worker.
+    `ready`, if given, is checked when the job is dequeued; while it returns False the job
+    keeps its place in line and the worker moves on.
+    """
+    _queue.put_nowait((priority, next(_seq), job_id, fn, ready))
 
-        logger = JobLogger(job_id)
-        JOBS[job_id] = {
-            "job_id": job_id,
-            "status": "running",
-            "logs": [],
-            "created_account": None,
-            "captcha_screenshot": None,
-            "user_data_dir": str(logger.path.parent / f"{job_id}_profile"),
-            "step_index": 0
-        }
 
+def queue_depth() -> int:
+    return _queue.qsize()
+
+
+async def _worker_loop():
+    while True:
+        item = await _queue.get()
+        *_, fn, ready = item
         try:
-            email = gen_email_from_curp(curp)
-            pwd = gen_password()
-            logger.log("gen_credentials", True, f"email={email}")
-            # Run automation
-            res = run_signup(job_id, email, pwd, logger, headless=False)
-            # update JOBS
-            JOBS[job_id]["logs"] = logger.entries
-            if res["status"] == "waiting_for_human":
-                JOBS[job_id]["status"] = "waiting_for_human"
-                # save screenshot path (already saved in logger.save_screenshot inside automation)
-                JOBS[job_id]["captcha_screenshot"] = logger.path.parent / f"{job_id}_captcha.png"
-                JOBS[job_id]["created_account"] = {
-                    "email": email,
-                    "password": pwd,
-                    "creation_status": "blocked_by_captcha",
-                    "creation_timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ")
-                }
-            elif res["status"] == "completed":
-                JOBS[job_id]["status"] = "completed"
-                JOBS[job_id]["created_account"] = {
-                    "email": email,
-                    "password": pwd,
-                    "creation_status": "success",
-                    "creation_timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ")
-                }
-                JOBS[job_id]["captcha_screenshot"] = None
-            else:
-                JOBS[job_id]["status"] = "failed"
-                JOBS[job_id]["created_account"] = {
-                    "email": email,
-                    "password": pwd,
-                    "creation_status": "failed"
-                }
-        except Exception as e:
-            logger.log("worker_exception", False, f"{e}")
-            JOBS[job_id]["status"] = "failed"
-            JOBS[job_id]["logs"] = logger.entries
-        JOB_QUEUE.task_done()
+            if ready is not None and not ready():
+                _queue.put_nowait(item)
+                await asyncio.sleep(RETRY_DELAY)
+                continue
+            await fn()
+        except Exception:
+            pass  # jobs record their own failures
+        finally:
+            _queue.task_done()
+
+
+def start_workers():
+    """Start the worker coroutines on the running event loop (idempotent)."""
+    while len(_workers) < MAX_CONCURRENT_JOBS:
+        _workers.add(asyncio.create_task(_worker_loop()))
 
-def start_worker():
-    global _worker_thread
-    if _worker_thread is None:
-        _worker_thread = threading.Thread(target=_worker_loop, daemon=True)
-        _worker_thread.start()
 
-def submit_job(curp: str):
-    job_id = str(uuid.uuid4())
-    JOB_QUEUE.put({"job_id": job_id, "curp": curp})
-    JOBS[job_id] = {"job_id": job_id, "status": "queued", "logs": [], "created_account": None, "captcha_screenshot": None}
-    return job_id
+async def stop_workers():
+    """Cancel the workers, and with them any job they are running."""
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
@@ -1,20 +1,29 @@
 # streamlit_app.py
 import streamlit as st
+import pandas as pd
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 import os
+import queue
+import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 API_BASE = st.secrets.get("API_BASE", "http://localhost:8000")
-
-st.set_page_config(page_title="Outlook Automation", page_icon="🤖", layout="wide")
-
-st.title("🤖 Outlook Web Automation — Interactive UI")
-st.markdown("---")
-
-# Sidebar with instructions
-with st.sidebar:
-    st.header("📋 Instructions")
-    st.markdown("""
+# "events": refresh when the API pushes a job change over /jobs/{id}/events;
+# "poll": long-poll GET /jobs/{id} with the last ETag until the job changes
+REFRESH_MODE = st.secrets.get("REFRESH_MODE", "events")
+LONG_POLL_WAIT = 30  # seconds the API holds an unchanged poll
+EVENTS_RETRY_DELAY = 2  # seconds before reopening an event stream that broke off
+API_TIMEOUT = 10  # seconds for every other call, so a stalled API can't hang a script run
+LOG_TAIL = 10  # log entries the status panel shows
+OVERVIEW_ROWS = 10  # newest jobs in the overview table
+# Seconds between auto-refresh checks per job status; any other status is final and ends auto-refresh
+REFRESH_INTERVALS = {"queued": 1, "running": 1, "resuming": 1, "waiting_for_human": 5}
+ERROR_REFRESH_INTERVAL = 3  # seconds between retries while the job can't be loaded (not found, API error)
+INSTRUCTIONS_MD = """
     **How this works:**
     1. Enter a CURP and submit the job
     2. Browser will open and show the signup process step-by-step
@@ -27,7 +36,408 @@ with st.sidebar:
     - 🔴 Red borders = buttons being clicked  
     - ⚠️ Yellow banner = needs manual intervention
     - ✅ Green banner = success!
-    """)
+    """
+
+# status -> (Streamlit element, icon) for the status badge; anything else is shown as in progress
+STATUS_RENDER = {
+    "completed": (st.success, "✅"),
+    "waiting_for_human": (st.warning, "⚠️"),
+    "failed": (st.error, "❌"),
+}
+# creation status -> (Streamlit element, label); every "waiting..." status shares one entry
+CREATION_RENDER = {
+    "success": (st.success, "✅ Created"),
+    "waiting": (st.warning, "⏳ Waiting"),
+    "failed": (st.error, "❌ Failed"),
+}
+
+
+@st.cache_resource
+def get_session():
+    """One keep-alive connection pool to the API, shared by every rerun."""
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+    session.headers["Connection"] = "keep-alive"
+    return session
+
+
+def _listen_job_events(job_id, events, stop):
+    """
+    Background thread: queue each payload of the job's event stream until the API closes it or `stop`
+    is set. A stream that breaks off (read timeout, API restart) is reopened; the snapshot every stream
+    starts with catches up on changes made in between.
+    """
+    with requests.Session() as session:  # its own connection: a Session isn't safe to share across threads
+        while not stop.is_set():
+            try:
+                with session.get(f"{API_BASE}/jobs/{job_id}/events", stream=True, timeout=(5, 60)) as r:
+                    if r.status_code >= 500:
+                        r.raise_for_status()
+                    for line in r.iter_lines(decode_unicode=True):
+                        if stop.is_set():
+                            return
+                        if line and line.startswith("data: "):
+                            events.put(line[len("data: "):])
+                break  # closed by the API: the job finished (or was never found)
+            except requests.RequestException:
+                stop.wait(EVENTS_RETRY_DELAY)
+    if not stop.is_set():
+        events.put(None)  # one more fetch shows the final state
+
+
+def _unsubscribe():
+    sub = st.session_state.pop("job_events", None)
+    if sub:
+        sub["stop"].set()
+
+
+def _job_event_arrived(job_id):
+    """
+    Non-blocking: has the job's event stream reported a state other than the one shown? Subscribes on
+    first use. Events carry the job's ETag, so one matching the shown job (e.g. the snapshot every new
+    stream starts with) is skipped without a fetch.
+    """
+    sub = st.session_state.get("job_events")
+    if not sub or sub["job_id"] != job_id:
+        _unsubscribe()
+        sub = {"job_id": job_id, "queue": queue.Queue(), "stop": threading.Event()}
+        threading.Thread(
+            target=_listen_job_events, args=(job_id, sub["queue"], sub["stop"]), daemon=True
+        ).start()
+        st.session_state["job_events"] = sub
+    arrived = False
+    while not sub["queue"].empty():
+        payload = sub["queue"].get_nowait()
+        if payload is None or orjson.loads(payload).get("etag") != st.session_state.get("last_etag"):
+            arrived = True  # a closed stream (None) counts too: one more fetch shows the final state
+    return arrived
+
+
+def _json(r):
+    """Response body parsed with orjson (the API encodes with it too; faster than r.json() on log-heavy jobs)."""
+    return orjson.loads(r.content)
+
+
+def _job_result(r):
+    """(ok, ETag, job JSON) for a GET /jobs/{id} response; the job is None when it failed."""
+    return r.ok, r.headers.get("ETag"), _json(r) if r.ok else None
+
+
+# Short TTLs: reruns from typing or clicking reuse the last response instead of hitting the API.
+# Auto-refresh and the actions clear them, since they rerun precisely because the job changed.
+# `since_seq` asks only for log entries the session doesn't have yet (see _merge_logs).
+@st.cache_data(ttl=2, show_spinner=False)
+def fetch_job(job_id, since_seq=0):
+    r = get_session().get(f"{API_BASE}/jobs/{job_id}", params={"since_seq": since_seq}, timeout=API_TIMEOUT)
+    return _job_result(r)
+
+
+@st.cache_data(ttl=2, show_spinner=False)
+def fetch_jobs(focus=None, since_seq=0):
+    """
+    GET /jobs as (rows, or None on an API error; the focused job as fetch_job() returns it).
+    A full run needs both the job list and the shown job, so `focus` brings the job in the same request.
+    """
+    params = {"limit": OVERVIEW_ROWS, "focus": focus, "since_seq": since_seq if focus else None}
+    r = get_session().get(f"{API_BASE}/jobs", params=params, timeout=API_TIMEOUT)
+    if not r.ok:
+        return None, (False, None, None)
+    body = _json(r)
+    job = body.get("focus")
+    return body["jobs"], (job is not None, body.get("focus_etag"), job)
+
+
+@st.cache_resource
+def get_poller():
+    """Worker threads for the long polls of every session; they live as long as the process."""
+    return ThreadPoolExecutor(max_workers=8, thread_name_prefix="job-poll")
+
+
+def _poll_once(job_id, etag, since_seq):
+    # A plain request, not get_session(): this runs on a poller thread and a Session isn't thread-safe
+    return requests.get(
+        f"{API_BASE}/jobs/{job_id}",
+        params={"wait": LONG_POLL_WAIT, "etag": etag, "since_seq": since_seq},
+        timeout=LONG_POLL_WAIT + 5,
+    )
+
+
+def _long_poll_done(job_id):
+    """
+    Non-blocking: has the long poll for the job's last ETag come back changed (kept for _load_job)?
+    The poll runs on the shared poller and is kept in session_state: later checks pick it back up
+    instead of stacking a second request, and a poll for another job or an older state is dropped.
+    """
+    wanted = (job_id, st.session_state.get("last_etag"))
+    pending = st.session_state.get("poll")
+    if pending and pending[0] != wanted:
+        pending[1].cancel()  # stale (another job, or an older state): drop it; one already sent is left unread
+        pending = None
+    if pending is None:
+        pending = (wanted, get_poller().submit(_poll_once, *wanted, _log_seq(job_id)))
+        st.session_state["poll"] = pending
+    if not pending[1].done():
+        return False
+    st.session_state.pop("poll")
+    try:
+        r = pending[1].result()
+    except requests.RequestException:
+        return True  # let the fetch report the error
+    if r.status_code == 304:
+        return False  # unchanged: the next check issues a new poll
+    st.session_state["prefetched_job"] = (job_id, _job_result(r))
+    return True
+
+
+def _job_changed(job_id):
+    if REFRESH_MODE == "events":
+        return _job_event_arrived(job_id)
+    return _long_poll_done(job_id)
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def load_shot(path, mtime):
+    """Screenshot bytes; `mtime` is part of the cache key, so a rewritten file is read again."""
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _log_seq(job_id):
+    """Number of the first log entry of `job_id` the session hasn't merged yet."""
+    logs = st.session_state.get("job_logs")
+    return logs["seq"] if logs and logs["job_id"] == job_id else 0
+
+
+def _merge_logs(job_id, job):
+    """Fold the new entries of a since_seq response into the session's log tail; returns the tail."""
+    logs = st.session_state.get("job_logs")
+    if not logs or logs["job_id"] != job_id:
+        logs = {"job_id": job_id, "seq": 0, "tail": deque(maxlen=LOG_TAIL)}
+        st.session_state["job_logs"] = logs
+    first = job["next_seq"] - len(job["logs"])
+    logs["tail"].extend(job["logs"][max(0, logs["seq"] - first):])  # a reused response may overlap the tail
+    logs["seq"] = max(logs["seq"], job["next_seq"])
+    return list(logs["tail"])
+
+
+def _load_job(job_id, since_seq, with_list=True):
+    """
+    (ok, job JSON) for the job, preferring the long poll's response; records its ETag and refresh interval.
+    `with_list` fetches it along with the job list (full runs render both). job["logs"] is the merged tail.
+    """
+    prefetched = st.session_state.pop("prefetched_job", None)
+    if prefetched and prefetched[0] == job_id:
+        ok, etag, job = prefetched[1]  # the long poll that triggered this run already has the new state
+    elif with_list:
+        ok, etag, job = fetch_jobs(job_id, since_seq)[1]
+    else:
+        ok, etag, job = fetch_job(job_id, since_seq)
+    if ok:
+        job["logs"] = _merge_logs(job_id, job)
+    st.session_state["last_etag"] = etag
+    # No interval (nothing to wait for) once the job is in a final state; a failed load is retried
+    st.session_state["refresh_interval"] = REFRESH_INTERVALS.get(job["status"]) if ok else ERROR_REFRESH_INTERVAL
+    return ok, job
+
+
+def render_status(job):
+    """Status badge and browser state."""
+    status = job["status"]
+    browser_open = job.get("browser_open", False)
+    
+    # Status badge
+    show, icon = STATUS_RENDER.get(status, (st.info, "🔄"))
+    show(f"{icon} **Status:** {status.upper()}")
+    
+    # Browser status
+    if browser_open:
+        st.info("🌐 **Browser is OPEN** - You can interact with it!")
+    else:
+        st.info("🔒 **Browser is CLOSED**")
+
+
+def render_screenshot(job):
+    """Latest screenshot of the job's browser, if there is one."""
+    if job.get("captcha_screenshot"):
+        st.subheader("🖼️ Current Screenshot")
+        screenshot_path = job["captcha_screenshot"]
+        
+        try:
+            shot = load_shot(screenshot_path, os.path.getmtime(screenshot_path))
+        except OSError:
+            st.warning("Screenshot file not found")
+        else:
+            st.image(shot, caption="Current browser state", use_column_width=True)
+
+
+def render_details(job):
+    """Recent logs and the progress note."""
+    status = job["status"]
+    
+    # Detailed logs
+    with st.expander("📋 Detailed Logs", expanded=False):
+        if job["logs"]:
+            for i, log_entry in enumerate(reversed(job["logs"])):  # Last LOG_TAIL logs
+                timestamp = log_entry["timestamp"]
+                step = log_entry["step"]
+                success = log_entry["success"]
+                message = log_entry["message"]
+                
+                icon = "✅" if success else "❌"
+                st.text(f"{icon} [{timestamp}] {step}: {message}")
+        else:
+            st.info("No logs yet...")
+    
+    # Progress indicator
+    if status in ["running", "resuming"]:
+        st.info("🔄 Process is running... Browser should be visible on your desktop!")
+        
+    elif status == "waiting_for_human":
+        st.warning("""
+        ⚠️ **MANUAL INTERVENTION NEEDED**
+        
+        1. 🔍 Look for the Microsoft Edge browser window on your desktop
+        2. 🧩 Solve any CAPTCHA or verification challenges  
+        3. ✋ Don't close the browser window
+        4. 🔄 Click "Resume Automation" above when ready
+        """)
+        
+    elif status == "completed":
+        st.success("""
+        🎉 **ACCOUNT CREATED SUCCESSFULLY!**
+        
+        ✅ Your Outlook account is ready to use
+        📧 Email and password are shown above
+        """)
+        st.balloons()
+        
+    elif status == "failed":
+        st.error("""
+        ❌ **AUTOMATION FAILED**
+        
+        Check the logs above for details about what went wrong.
+        You may need to try again or create the account manually.
+        """)
+
+
+def _shown_state():
+    ok, job = st.session_state.get("shown_job", (None, None))
+    return (job["status"], job.get("browser_open", False)) if ok else ok
+
+
+def status_panel(job_id, live):
+    """
+    Status, account details, actions and logs of the shown job. While auto-refresh is on (`live`) this
+    runs as a fragment every refresh interval: a tick re-fetches only when the API reported a change,
+    and reruns the whole app when the status or browser state changed (the actions, job table and
+    interval follow those).
+    """
+    if not st.session_state.pop("panel_fresh", False) and live and _job_changed(job_id):
+        before = _shown_state()
+        try:
+            fetch_job.clear()
+            st.session_state["shown_job"] = _load_job(job_id, _log_seq(job_id), with_list=False)
+        except Exception as e:
+            st.session_state["shown_job"] = (None, e)
+        if _shown_state() != before:
+            fetch_jobs.clear()
+            st.rerun()
+    
+    ok, job = st.session_state["shown_job"]
+    if ok is None:
+        st.error(f"❌ Connection error: {job}")
+        return
+    if not ok:
+        st.error("❌ Job not found or API error")
+        return
+    
+    status = job["status"]
+    browser_open = job.get("browser_open", False)
+    render_status(job)
+    
+    # Account details
+    st.subheader("📧 Account Details")
+    account = job["created_account"]
+    col_email, col_pass, col_status = st.columns([2, 2, 1])
+
+    with col_email:
+        st.text_input("Email", value=account["email"], disabled=True)
+    with col_pass:
+        st.text_input("Password", value=account["password"], type="password", disabled=True)
+    with col_status:
+        creation_status = account["creation_status"]
+        key = "waiting" if "waiting" in creation_status else creation_status
+        show, label = CREATION_RENDER.get(key, (st.info, f"🔄 {creation_status}"))
+        show(label)
+
+    # CAPTCHA Screenshot
+    render_screenshot(job)
+
+    # Action buttons
+    st.subheader("🎮 Actions")
+
+    button_col1, button_col2, button_col3 = st.columns([2, 2, 1])
+
+    with button_col1:
+        if status == "waiting_for_human" and browser_open:
+            if st.button("🔄 **Resume Automation**", use_container_width=True, type="primary"):
+                with st.spinner("🔄 Resuming automation..."):
+                    try:
+                        resume_r = get_session().post(f"{API_BASE}/jobs/{job_id}/resume", timeout=API_TIMEOUT)
+                        if resume_r.ok:
+                            fetch_job.clear()
+                            fetch_jobs.clear()
+                            st.success("✅ Automation resumed!")
+                            time.sleep(2)
+                            st.rerun()
+                        else:
+                            st.error(f"❌ Resume failed: {resume_r.text}")
+                    except Exception as e:
+                        st.error(f"❌ Error: {e}")
+        else:
+            st.button("🔄 Resume (Not Available)", disabled=True, use_container_width=True)
+
+    with button_col2:
+        if browser_open:
+            if st.button("🚪 Close Browser", use_container_width=True):
+                try:
+                    close_r = get_session().delete(f"{API_BASE}/jobs/{job_id}/browser", timeout=API_TIMEOUT)
+                    if close_r.ok:
+                        fetch_job.clear()
+                        fetch_jobs.clear()
+                        st.success("✅ Browser closed!")
+                        time.sleep(1)
+                        st.rerun()
+                    else:
+                        st.error(f"❌ Close failed: {close_r.text}")
+                except Exception as e:
+                    st.error(f"❌ Error: {e}")
+        else:
+            st.button("🚪 Close Browser (Not Open)", disabled=True, use_container_width=True)
+
+    with button_col3:
+        if st.button("📋 Copy"):
+            st.code(f"Email: {account['email']}\nPassword: {account['password']}")
+
+    render_details(job)
+
+
+st.set_page_config(page_title="Outlook Automation", page_icon="🤖", layout="wide")
+
+# Static page chrome. It has to be emitted on every full run (Streamlit drops elements a run doesn't
+# repeat), but auto-refresh ticks only rerun the status panel fragment and never reach it.
+def _render_chrome():
+    st.title("🤖 Outlook Web Automation — Interactive UI")
+    st.markdown("---")
+    
+    # Sidebar with instructions
+    with st.sidebar:
+        st.header("📋 Instructions")
+        st.markdown(INSTRUCTIONS_MD)
+
+
+_render_chrome()
 
 # Main content in two columns
 col1, col2 = st.columns([1, 1])
@@ -36,7 +446,7 @@ with col1:
     st.header("🚀 Submit New Job")
     
     with st.form("submit_job"):
-        curp = st.text_input("CURP (Mexican ID)", placeholder="e.g., CURP123456HDFZRL09")
+        curp = st.text_input("CURP (Mexican ID)", placeholder="e.g., CURP123456HDFZRL09", key="curp")
         submitted = st.form_submit_button("🎯 Start Automation", use_container_width=True)
         
         if submitted:
@@ -45,9 +455,10 @@ with col1:
             else:
                 with st.spinner("🚀 Starting automation..."):
                     try:
-                        r = requests.post(f"{API_BASE}/jobs", json={"curp": curp})
+                        r = get_session().post(f"{API_BASE}/jobs", json={"curp": curp}, timeout=API_TIMEOUT)
                         if r.ok:
-                            job = r.json()
+                            job = _json(r)
+                            fetch_jobs.clear()
                             st.success("✅ Job submitted successfully!")
                             st.info(f"**Job ID:** `{job['job_id']}`")
                             st.info(f"**Email:** `{job['email']}`")
@@ -61,200 +472,72 @@ with col2:
     st.header("🔍 Check Job Status")
     
     # Auto-refresh toggle
-    auto_refresh = st.checkbox("🔄 Auto-refresh every 3 seconds", value=False)
+    if st.session_state.pop("stop_auto_refresh", False):
+        st.session_state["auto_refresh"] = False  # the job finished on the previous run
+    auto_refresh = st.checkbox("🔄 Auto-refresh on job changes", value=False, key="auto_refresh")
+    if not auto_refresh:
+        _unsubscribe()
     
-    job_id = st.text_input("Job ID", placeholder="Enter job ID to check status")
+    job_id = st.text_input("Job ID", placeholder="Enter job ID to check status", key="job_id")
     
     col2a, col2b = st.columns([3, 1])
     with col2a:
-        check_clicked = st.button("🔍 Check Status", use_container_width=True)
+        if st.button("🔍 Check Status", use_container_width=True):
+            st.session_state["checked_job_id"] = job_id
     with col2b:
-        if st.button("🔄"):
+        if st.button("🔄", help="Force refresh"):
+            fetch_job.clear()
+            fetch_jobs.clear()
             st.rerun()
-    
-    if auto_refresh and job_id:
-        time.sleep(3)
-        st.rerun()
 
-# Job status display
-if (check_clicked or auto_refresh) and job_id:
+# Job status display: stays up for the checked job across reruns from other widgets (Resume, Close, ...)
+if job_id and auto_refresh:
+    st.session_state["checked_job_id"] = job_id  # keep showing it once auto-refresh stops
+panel_job_id = job_id if job_id and st.session_state.get("checked_job_id") == job_id else None
+list_args = (panel_job_id, _log_seq(panel_job_id)) if panel_job_id else ()
+if panel_job_id:
     try:
-        r = requests.get(f"{API_BASE}/jobs/{job_id}")
-        if r.ok:
-            job = r.json()
-            
-            # Status indicator
-            status = job["status"]
-            browser_open = job.get("browser_open", False)
-            
-            # Status badge
-            if status == "completed":
-                st.success(f"✅ **Status:** {status.upper()}")
-            elif status == "waiting_for_human":
-                st.warning(f"⚠️ **Status:** {status.upper()}")
-            elif status == "failed":
-                st.error(f"❌ **Status:** {status.upper()}")
-            else:
-                st.info(f"🔄 **Status:** {status.upper()}")
-            
-            # Browser status
-            if browser_open:
-                st.info("🌐 **Browser is OPEN** - You can interact with it!")
-            else:
-                st.info("🔒 **Browser is CLOSED**")
-            
-            # Account details
-            st.subheader("📧 Account Details")
-            account = job["created_account"]
-            col_email, col_pass, col_status = st.columns([2, 2, 1])
-            
-            with col_email:
-                st.text_input("Email", value=account["email"], disabled=True)
-            with col_pass:
-                st.text_input("Password", value=account["password"], type="password", disabled=True)
-            with col_status:
-                creation_status = account["creation_status"]
-                if creation_status == "success":
-                    st.success("✅ Created")
-                elif "waiting" in creation_status:
-                    st.warning("⏳ Waiting")
-                elif creation_status == "failed":
-                    st.error("❌ Failed")
-                else:
-                    st.info(f"🔄 {creation_status}")
-            
-            # CAPTCHA Screenshot
-            if job.get("captcha_screenshot"):
-                st.subheader("🖼️ Current Screenshot")
-                screenshot_path = job["captcha_screenshot"]
-                
-                if os.path.exists(screenshot_path):
-                    st.image(screenshot_path, caption="Current browser state", use_column_width=True)
-                else:
-                    st.warning("Screenshot file not found")
-            
-            # Action buttons
-            st.subheader("🎮 Actions")
-            
-            button_col1, button_col2, button_col3 = st.columns([2, 2, 1])
-            
-            with button_col1:
-                if status == "waiting_for_human" and browser_open:
-                    if st.button("🔄 **Resume Automation**", use_container_width=True, type="primary"):
-                        with st.spinner("🔄 Resuming automation..."):
-                            try:
-                                resume_r = requests.post(f"{API_BASE}/jobs/{job_id}/resume")
-                                if resume_r.ok:
-                                    st.success("✅ Automation resumed!")
-                                    time.sleep(2)
-                                    st.rerun()
-                                else:
-                                    st.error(f"❌ Resume failed: {resume_r.text}")
-                            except Exception as e:
-                                st.error(f"❌ Error: {e}")
-                else:
-                    st.button("🔄 Resume (Not Available)", disabled=True, use_container_width=True)
-            
-            with button_col2:
-                if browser_open:
-                    if st.button("🚪 Close Browser", use_container_width=True):
-                        try:
-                            close_r = requests.delete(f"{API_BASE}/jobs/{job_id}/browser")
-                            if close_r.ok:
-                                st.success("✅ Browser closed!")
-                                time.sleep(1)
-                                st.rerun()
-                            else:
-                                st.error(f"❌ Close failed: {close_r.text}")
-                        except Exception as e:
-                            st.error(f"❌ Error: {e}")
-                else:
-                    st.button("🚪 Close Browser (Not Open)", disabled=True, use_container_width=True)
-            
-            with button_col3:
-                if st.button("📋 Copy"):
-                    st.code(f"Email: {account['email']}\nPassword: {account['password']}")
-            
-            # Detailed logs
-            with st.expander("📋 Detailed Logs", expanded=False):
-                if job["logs"]:
-                    for i, log_entry in enumerate(reversed(job["logs"][-10:])):  # Show last 10 logs
-                        timestamp = log_entry["timestamp"]
-                        step = log_entry["step"]
-                        success = log_entry["success"]
-                        message = log_entry["message"]
-                        
-                        icon = "✅" if success else "❌"
-                        st.text(f"{icon} [{timestamp}] {step}: {message}")
-                else:
-                    st.info("No logs yet...")
-            
-            # Progress indicator
-            if status in ["running", "resuming"]:
-                st.info("🔄 Process is running... Browser should be visible on your desktop!")
-                
-            elif status == "waiting_for_human":
-                st.warning("""
-                ⚠️ **MANUAL INTERVENTION NEEDED**
-                
-                1. 🔍 Look for the Microsoft Edge browser window on your desktop
-                2. 🧩 Solve any CAPTCHA or verification challenges  
-                3. ✋ Don't close the browser window
-                4. 🔄 Click "Resume Automation" above when ready
-                """)
-                
-            elif status == "completed":
-                st.success("""
-                🎉 **ACCOUNT CREATED SUCCESSFULLY!**
-                
-                ✅ Your Outlook account is ready to use
-                📧 Email and password are shown above
-                """)
-                st.balloons()
-                
-            elif status == "failed":
-                st.error("""
-                ❌ **AUTOMATION FAILED**
-                
-                Check the logs above for details about what went wrong.
-                You may need to try again or create the account manually.
-                """)
-        
-        else:
-            st.error("❌ Job not found or API error")
-            
+        # With the overview closed there is no job list to bring along
+        st.session_state["shown_job"] = _load_job(*list_args, with_list=st.session_state.get("overview_open", False))
     except Exception as e:
-        st.error(f"❌ Connection error: {e}")
+        st.session_state["shown_job"] = (None, e)
+        st.session_state["refresh_interval"] = ERROR_REFRESH_INTERVAL
+    st.session_state["panel_fresh"] = True  # the panel's first run renders what was just loaded
+    refresh_every = st.session_state.get("refresh_interval") if auto_refresh else None
+    if auto_refresh and refresh_every is None:
+        st.session_state["stop_auto_refresh"] = True
+        st.caption("Job finished — auto-refresh disabled")
+    # Auto-refresh reruns only the panel (a fragment), at the job status's interval
+    st.fragment(run_every=refresh_every)(status_panel)(panel_job_id, refresh_every is not None)
 
 # Footer with all jobs
 st.markdown("---")
 st.subheader("📊 All Jobs Overview")
 
-try:
-    all_jobs_r = requests.get(f"{API_BASE}/jobs")
-    if all_jobs_r.ok:
-        all_jobs = all_jobs_r.json()["jobs"]
-        
-        if all_jobs:
-            # Create a table view
-            job_data = []
-            for job in all_jobs[-10:]:  # Show last 10 jobs
-                job_data.append({
-                    "Job ID": job["job_id"][:8] + "...",
-                    "Email": job["email"],
-                    "Status": job["status"],
-                    "Browser": "🌐 Open" if job.get("browser_open") else "🔒 Closed",
-                    "Account": job["creation_status"]
+# Only fetched while shown: GET /jobs is skipped entirely with the overview closed
+if st.toggle("Show all jobs", key="overview_open"):
+    try:
+        all_jobs, _ = fetch_jobs(*list_args)  # cached from the status panel's fetch
+        if all_jobs is not None:
+
+            if all_jobs:
+                # Create a table view (the API already trimmed it to the newest OVERVIEW_ROWS jobs)
+                rows = pd.DataFrame.from_records(
+                    all_jobs, columns=["job_id", "email", "status", "browser_open", "creation_status"]
+                )
+                job_data = pd.DataFrame({
+                    "Job ID": rows["job_id"].str.slice(0, 8) + "...",
+                    "Email": rows["email"],
+                    "Status": rows["status"],
+                    "Browser": rows["browser_open"].map({True: "🌐 Open", False: "🔒 Closed"}),
+                    "Account": rows["creation_status"],
                 })
-            
-            st.dataframe(job_data, use_container_width=True)
+
+                st.dataframe(job_data, use_container_width=True)
+            else:
+                st.info("No jobs yet")
         else:
-            st.info("No jobs yet")
-    else:
-        st.warning("Could not fetch job list")
-except Exception as e:
-    st.warning(f"Could not fetch jobs: {e}")
+            st.warning("Could not fetch job list")
+    except Exception as e:
+        st.warning(f"Could not fetch jobs: {e}")
 
-# Auto-refresh for active jobs
-if auto_refresh:
-    st.rerun()
\ No newline at end of file